@@ -14,9 +14,10 @@ class RecipeAdmin(admin.ModelAdmin):
     list_filter = ('author', 'name', 'tags')
     inlines = (IngredientsInLine,)
 
+    @admin.display(
+        description='Добавлений в избранное', ordering='favorites_count')
     def amount_of_adding_to_favorite(self, obj):
-        count = FavoriteRecipe.objects.filter(recipe=obj).count()
-        return count
+        return obj.favorites_count
 
 
 class IngredientAdmin(admin.ModelAdmin):
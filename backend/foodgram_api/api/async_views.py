@@ -0,0 +1,52 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from .db import check_connections
+
+ASYNC_VIEW_NAMES = (
+    'recipes-list',
+    'recipes-detail',
+    'recipes-shopping-list',
+    'tag-list',
+    'tag-detail',
+    'ingredient-list',
+    'ingredient-detail',
+    'shoppingcart-list',
+)
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.ASYNC_VIEW_THREADS, thread_name_prefix='api-views')
+
+
+def run_view(view, request, *args, **kwargs):
+    close_old_connections()
+    check_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        if response.streaming:
+            response.streaming_content = list(response.streaming_content)
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_view(view):
+    run = sync_to_async(run_view, thread_sensitive=False, executor=executor)
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        return await run(view, request, *args, **kwargs)
+    return wrapper
+
+
+def make_views_async(urlpatterns, names=ASYNC_VIEW_NAMES):
+    for pattern in urlpatterns:
+        if pattern.name in names:
+            pattern.callback = async_view(pattern.callback)
+    return urlpatterns
@@ -0,0 +1,159 @@
+SMALL_IMAGE = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABAgMAAABieywaAAAA'
+    'CVBMVEUAAAD///9fX1/S0ecCAAAACXBIWXMAAA7EAAAOxAGVKw4bAAAACklEQVQImWNo'
+    'AAAAggCByxOyYQAAAABJRU5ErkJggg=='
+)
+
+
+class Endpoint:
+
+    def __init__(self, name, method, path, query_budget, auth=True,
+                 payload=None, expected_status=200, collect=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.query_budget = query_budget
+        self.auth = auth
+        self.payload = payload
+        self.expected_status = expected_status
+        self.collect = collect
+
+    @property
+    def is_safe(self):
+        return self.method == 'get'
+
+    def get_path(self, context, number):
+        if callable(self.path):
+            return self.path(context, number)
+        return self.path.format(**context)
+
+    def get_payload(self, context, number):
+        if callable(self.payload):
+            return self.payload(context, number)
+        return self.payload
+
+
+def nth(key):
+    def get(context, number):
+        values = context[key]
+        return values[number % len(values)]
+    return get
+
+
+def recipe_payload(context, number):
+    return {
+        'name': f'Рецепт для замера {number}',
+        'text': 'Описание рецепта для замера производительности.',
+        'cooking_time': 30,
+        'image': SMALL_IMAGE,
+        'tags': context['tags'][:2],
+        'ingredients': [
+            {'id': ingredient_id, 'amount': 100}
+            for ingredient_id in context['ingredients'][:10]
+        ],
+    }
+
+
+recipe = nth('recipes')
+free_recipe = nth('free_recipes')
+author = nth('authors')
+created_recipe = nth('created_recipes')
+
+
+def recipe_path(context, number):
+    return f'/api/recipes/{recipe(context, number)}/'
+
+
+def pantry_path(context, number):
+    return '/api/recipes/what_can_i_cook/?' + '&'.join(
+        f'ingredients={pk}' for pk in context['ingredients'][:15])
+
+
+def created_recipe_path(context, number):
+    return f'/api/recipes/{created_recipe(context, number)}/'
+
+
+def favorite_path(context, number):
+    return f'/api/recipes/{free_recipe(context, number)}/favorite/'
+
+
+def shopping_cart_path(context, number):
+    return f'/api/recipes/{free_recipe(context, number)}/shopping_cart/'
+
+
+def menu_payload(context, number):
+    recipes = context['free_recipes']
+    return {'recipes': [
+        recipes[(number * 7 + day) % len(recipes)] for day in range(7)
+    ]}
+
+
+def subscribe_path(context, number):
+    return f'/api/users/{author(context, number)}/subscribe/'
+
+
+ENDPOINTS = (
+    Endpoint('recipes: list (anonymous)', 'get',
+             '/api/recipes/', 6, auth=False),
+    Endpoint('recipes: list', 'get', '/api/recipes/', 7),
+    Endpoint('recipes: list, limit=100', 'get', '/api/recipes/?limit=100', 7),
+    Endpoint('recipes: list, view=card', 'get',
+             '/api/recipes/?view=card&limit=100', 5),
+    Endpoint('recipes: list, cursor', 'get',
+             '/api/recipes/?pagination=cursor', 6),
+    Endpoint('recipes: filter by tags', 'get',
+             '/api/recipes/?tags={tag_slug}&tags={second_tag_slug}', 8),
+    Endpoint('recipes: filter by author', 'get',
+             '/api/recipes/?author={user}', 8),
+    Endpoint('recipes: search', 'get',
+             '/api/recipes/?search={search_word}', 6, auth=False),
+    Endpoint('recipes: what can i cook', 'get', pantry_path, 6),
+    Endpoint('recipes: recommended', 'get', '/api/recipes/recommended/', 7),
+    Endpoint('recipes: retrieve', 'get', recipe_path, 6),
+    Endpoint('recipes: create', 'post', '/api/recipes/', 14,
+             payload=recipe_payload, expected_status=201,
+             collect='created_recipes'),
+    Endpoint('recipes: update', 'patch', created_recipe_path, 16,
+             payload=recipe_payload),
+    Endpoint('tags: list', 'get', '/api/tags/', 1, auth=False),
+    Endpoint('tags: retrieve', 'get', '/api/tags/{tag}/', 1, auth=False),
+    Endpoint('ingredients: list', 'get', '/api/ingredients/', 1, auth=False),
+    Endpoint('ingredients: search', 'get',
+             '/api/ingredients/?name={ingredient_prefix}', 2, auth=False),
+    Endpoint('ingredients: retrieve', 'get',
+             '/api/ingredients/{ingredient}/', 1, auth=False),
+    Endpoint('favorite: add', 'post', favorite_path, 8,
+             expected_status=201),
+    Endpoint('recipes: favorites', 'get', '/api/recipes/?is_favorited=1', 7),
+    Endpoint('shopping cart: add', 'post', shopping_cart_path, 8,
+             expected_status=201),
+    Endpoint('recipes: shopping cart', 'get',
+             '/api/recipes/?is_in_shopping_cart=1', 7),
+    Endpoint('shopping cart: download', 'get',
+             '/api/recipes/download_shopping_cart/', 2),
+    Endpoint('shopping cart: list', 'get', '/api/recipes/shopping_list/', 2),
+    Endpoint('favorite: remove', 'delete', favorite_path, 7,
+             expected_status=204),
+    Endpoint('shopping cart: remove', 'delete', shopping_cart_path, 7,
+             expected_status=204),
+    Endpoint('favorite: add many', 'post', '/api/recipes/favorite/', 7,
+             payload=menu_payload),
+    Endpoint('shopping cart: add many', 'post',
+             '/api/recipes/shopping_cart/', 7, payload=menu_payload),
+    Endpoint('favorite: remove many', 'delete', '/api/recipes/favorite/', 7,
+             payload=menu_payload),
+    Endpoint('shopping cart: remove many', 'delete',
+             '/api/recipes/shopping_cart/', 7, payload=menu_payload),
+    Endpoint('subscribe', 'post', subscribe_path, 7,
+             expected_status=201),
+    Endpoint('subscriptions: list', 'get', '/api/users/subscriptions/', 5),
+    Endpoint('subscriptions: list, recipes_limit=3', 'get',
+             '/api/users/subscriptions/?recipes_limit=3', 5),
+    Endpoint('unsubscribe', 'delete', subscribe_path, 5,
+             expected_status=204),
+    Endpoint('recipes: delete', 'delete', created_recipe_path, 9,
+             expected_status=204),
+    Endpoint('users: list', 'get', '/api/users/', 2, auth=False),
+    Endpoint('users: retrieve', 'get', '/api/users/{user}/', 3),
+    Endpoint('users: me', 'get', '/api/users/me/', 2),
+)
@@ -0,0 +1,257 @@
+import json
+import os
+import socket
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from urllib.error import HTTPError
+from urllib.parse import quote
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.cache import is_process_local
+from api.models import Ingredient, Recipe, Tag
+from users.models import User
+
+SERVER_START_TIMEOUT = 30
+FILE_CACHE = 'django.core.cache.backends.filebased.FileBasedCache'
+DB_DELAY_ENV = 'BENCHMARK_DB_DELAY'
+SERVER_MODES = {
+    'wsgi': ('api.benchmarks.server:wsgi_application', None),
+    'asgi': ('api.benchmarks.server:asgi_application',
+             'uvicorn.workers.UvicornWorker'),
+}
+
+
+class EndpointResult:
+
+    def __init__(self, endpoint, timings, elapsed, queries=None,
+                 statuses=None, mode=None):
+        self.endpoint = endpoint
+        self.name = f'[{mode}] {endpoint.name}' if mode else endpoint.name
+        self.timings = sorted(timings)
+        self.elapsed = elapsed
+        self.queries = queries or []
+        self.statuses = statuses or []
+
+    def percentile(self, percent):
+        if not self.timings:
+            return 0
+        index = max(int(round(len(self.timings) * percent / 100)) - 1, 0)
+        return self.timings[index]
+
+    @property
+    def throughput(self):
+        return len(self.timings) / self.elapsed if self.elapsed else 0
+
+    @property
+    def max_queries(self):
+        return max(self.queries, default=None)
+
+    @property
+    def unexpected_statuses(self):
+        return sorted({
+            status for status in self.statuses
+            if status != self.endpoint.expected_status
+        })
+
+    @property
+    def over_budget(self):
+        return (
+            self.max_queries is not None
+            and self.max_queries > self.endpoint.query_budget
+        )
+
+    @property
+    def failed(self):
+        return self.over_budget or bool(self.unexpected_statuses)
+
+
+def delay_query(seconds, execute, sql, params, many, context):
+    time.sleep(seconds)
+    return execute(sql, params, many, context)
+
+
+def delay_queries(seconds):
+    return connection.execute_wrapper(partial(delay_query, seconds))
+
+
+def build_context(seeded):
+    user = User.objects.create_user(
+        username='benchmark', email='benchmark@example.com',
+        password='benchmark', first_name='Бенчмарк', last_name='Бенчмарков')
+    tags = list(Tag.objects.filter(
+        pk__in=seeded['tags']).order_by('pk').values_list('pk', 'slug'))
+    ingredient = Ingredient.objects.get(pk=seeded['ingredients'][0])
+    recipe = Recipe.objects.get(pk=seeded['recipes'][0])
+    recipes = seeded['recipes'][:1000]
+    free_recipes = list(Recipe.objects.filter(
+        pk__in=recipes, favorites_count=0, in_carts_count=0
+    ).values_list('pk', flat=True))
+    return {
+        'token': Token.objects.create(user=user).key,
+        'user': seeded['users'][0],
+        'authors': seeded['users'][:1000],
+        'recipes': recipes,
+        'free_recipes': free_recipes,
+        'created_recipes': [],
+        'tag': tags[0][0],
+        'tag_slug': tags[0][1],
+        'second_tag_slug': tags[1][1],
+        'tags': [pk for pk, _ in tags],
+        'ingredient': ingredient.pk,
+        'ingredient_prefix': ingredient.name[:3],
+        'ingredients': seeded['ingredients'],
+        'search_word': recipe.name.split()[0],
+    }
+
+
+def run_with_client(endpoints, context, requests):
+    client = APIClient()
+    results = []
+    for endpoint in endpoints:
+        if endpoint.auth:
+            client.credentials(HTTP_AUTHORIZATION=f'Token {context["token"]}')
+        else:
+            client.credentials()
+        timings, queries, statuses = [], [], []
+        started = time.perf_counter()
+        for number in range(requests):
+            path = endpoint.get_path(context, number)
+            payload = endpoint.get_payload(context, number)
+            with CaptureQueriesContext(connection) as captured:
+                request_started = time.perf_counter()
+                if endpoint.is_safe:
+                    response = client.get(path)
+                else:
+                    response = getattr(client, endpoint.method)(
+                        path, payload, format='json')
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                timings.append(
+                    (time.perf_counter() - request_started) * 1000)
+            queries.append(len(captured))
+            statuses.append(response.status_code)
+            if endpoint.collect and response.status_code < 300:
+                context[endpoint.collect].append(response.json()['id'])
+        results.append(EndpointResult(
+            endpoint, timings, time.perf_counter() - started,
+            queries=queries, statuses=statuses))
+    return results
+
+
+def wait_for_port(port, timeout=SERVER_START_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f'Сервер не запустился на порту {port}')
+
+
+@contextmanager
+def gunicorn_server(port, workers=2, mode='wsgi', env=None):
+    application, worker_class = SERVER_MODES[mode]
+    command = [
+        'gunicorn', application,
+        '--bind', f'127.0.0.1:{port}',
+        '--workers', str(workers),
+    ]
+    if worker_class:
+        command += ['--worker-class', worker_class]
+    env = {**os.environ, 'SERVER_MODE': mode, **(env or {})}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        if workers > 1 and is_process_local(caches['default']):
+            env.update(CACHE_BACKEND=FILE_CACHE, CACHE_LOCATION=cache_dir)
+        process = subprocess.Popen(
+            command, cwd=settings.BASE_DIR, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_for_port(port)
+            yield f'http://127.0.0.1:{port}'
+        finally:
+            process.terminate()
+            process.wait()
+
+
+def send(base_url, path, headers):
+    request = Request(
+        base_url + quote(path, safe='/?=&'), headers=headers)
+    started = time.perf_counter()
+    try:
+        with urlopen(request) as response:
+            response.read()
+            status = response.status
+    except HTTPError as error:
+        status = error.code
+    return (time.perf_counter() - started) * 1000, status
+
+
+def run_over_http(endpoints, context, requests, base_url, concurrency,
+                  mode=None):
+    results = []
+    for endpoint in endpoints:
+        headers = {'Accept': 'application/json'}
+        if endpoint.auth:
+            headers['Authorization'] = f'Token {context["token"]}'
+        paths = [
+            endpoint.get_path(context, number) for number in range(requests)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            responses = list(pool.map(
+                lambda path: send(base_url, path, headers), paths))
+        results.append(EndpointResult(
+            endpoint,
+            [timing for timing, _ in responses],
+            time.perf_counter() - started,
+            statuses=[status for _, status in responses],
+            mode=mode,
+        ))
+    return results
+
+
+def format_results(results):
+    lines = [
+        f'{"endpoint":40} {"p50 ms":>8} {"p95 ms":>8} {"req/s":>8} '
+        f'{"queries":>7} {"budget":>6}  status'
+    ]
+    for result in results:
+        queries = result.max_queries
+        status = 'OK'
+        if result.over_budget:
+            status = 'OVER BUDGET'
+        if result.unexpected_statuses:
+            status = f'HTTP {result.unexpected_statuses}'
+        lines.append(
+            f'{result.name:40} {result.percentile(50):8.1f} '
+            f'{result.percentile(95):8.1f} {result.throughput:8.1f} '
+            f'{"-" if queries is None else queries:>7} '
+            f'{result.endpoint.query_budget:>6}  {status}'
+        )
+    return '\n'.join(lines)
+
+
+def results_to_json(results):
+    return json.dumps([
+        {
+            'endpoint': result.name,
+            'p50_ms': result.percentile(50),
+            'p95_ms': result.percentile(95),
+            'throughput': result.throughput,
+            'max_queries': result.max_queries,
+            'query_budget': result.endpoint.query_budget,
+            'failed': result.failed,
+        }
+        for result in results
+    ], ensure_ascii=False, indent=2)
@@ -0,0 +1,152 @@
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from api.cache import (recipe_catalog, recipe_detail_catalog,
+                       recipe_search_catalog)
+from api.matching import recipe_ingredient_index
+from api.models import (FavoriteRecipe, Ingredient, Recipe, RecipeIngredient,
+                        ShoppingCart, Tag)
+from api.search import reindex_recipes
+from api.shopping_list import refresh_shopping_lists
+from users.models import Follow, User
+
+BATCH_SIZE = 5000
+SEED_PASSWORD = 'seed-password'
+SEED_IMAGE = 'seed.png'
+SEED_TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+    ('Десерт', '#F4C430', 'dessert'),
+    ('Выпечка', '#B5651D', 'bakery'),
+)
+SYLLABLES = (
+    'ка', 'ро', 'ми', 'ла', 'то', 'ны', 'све', 'кла', 'мо', 'ре',
+    'ба', 'тат', 'пер', 'ец', 'лук', 'сы', 'го', 'рох', 'ва', 'ни',
+)
+UNITS = ('г', 'кг', 'мл', 'л', 'шт', 'ст. л.', 'ч. л.')
+
+
+class Rollback(Exception):
+    pass
+
+
+def invalidate_indexes():
+    recipe_search_catalog.bump()
+    recipe_catalog.bump()
+    recipe_detail_catalog.bump()
+    recipe_ingredient_index.invalidate()
+
+
+@contextmanager
+def rolled_back():
+    try:
+        with transaction.atomic():
+            yield
+            raise Rollback
+    except Rollback:
+        pass
+    finally:
+        invalidate_indexes()
+
+
+@contextmanager
+def explicit_creation_dates():
+    field = Recipe._meta.get_field('date_of_creation')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def make_words(rng, count):
+    return ' '.join(
+        ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        for _ in range(count)
+    )
+
+
+def bulk_create(model, objects):
+    last_pk = model.objects.order_by('-pk').values_list(
+        'pk', flat=True).first() or 0
+    model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+    return list(model.objects.filter(pk__gt=last_pk).order_by(
+        'pk').values_list('pk', flat=True))
+
+
+def seed_dataset(users=1000, recipes=100000, ingredients=2000,
+                 ingredients_per_recipe=8, follows_per_user=20,
+                 favorites_per_user=30, cart_per_user=5, seed=0):
+    rng = random.Random(seed)
+    password = make_password(SEED_PASSWORD)
+    user_ids = bulk_create(User, (
+        User(username=f'seed{seed}-{number}',
+             email=f'seed{seed}-{number}@example.com',
+             first_name='Имя', last_name='Фамилия', password=password)
+        for number in range(users)
+    ))
+    tag_ids = bulk_create(Tag, (
+        Tag(name=name, color=color, slug=f'{slug}-{seed}')
+        for name, color, slug in SEED_TAGS
+    ))
+    ingredient_ids = bulk_create(Ingredient, (
+        Ingredient(name=f'{make_words(rng, 1)} {number}',
+                   measurement_unit=rng.choice(UNITS))
+        for number in range(ingredients)
+    ))
+    now = timezone.now()
+    with explicit_creation_dates():
+        recipe_ids = bulk_create(Recipe, (
+            Recipe(
+                author_id=rng.choice(user_ids),
+                name=make_words(rng, rng.randint(1, 3)),
+                text=make_words(rng, rng.randint(10, 40)),
+                cooking_time=rng.randint(5, 180),
+                image=SEED_IMAGE,
+                date_of_creation=now - timedelta(minutes=number),
+            )
+            for number in range(recipes)
+        ))
+    reindex_recipes(Recipe.objects.filter(pk__gte=recipe_ids[0]))
+    bulk_create(Recipe.tags.through, (
+        Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+        for recipe_id in recipe_ids
+        for tag_id in rng.sample(tag_ids, rng.randint(1, 2))
+    ))
+    bulk_create(RecipeIngredient, (
+        RecipeIngredient(recipe_id=recipe_id, ingredient_id=ingredient_id,
+                         amount=rng.randint(1, 500))
+        for recipe_id in recipe_ids
+        for ingredient_id in rng.sample(
+            ingredient_ids, rng.randint(2, ingredients_per_recipe))
+    ))
+    bulk_create(Follow, (
+        Follow(user_id=user_id, author_id=author_id)
+        for user_id in user_ids
+        for author_id in rng.sample(
+            user_ids, min(follows_per_user, len(user_ids)))
+        if author_id != user_id
+    ))
+    for model, per_user in ((FavoriteRecipe, favorites_per_user),
+                            (ShoppingCart, cart_per_user)):
+        bulk_create(model, (
+            model(user_id=user_id, recipe_id=recipe_id)
+            for user_id in user_ids
+            for recipe_id in rng.sample(
+                recipe_ids, min(per_user, len(recipe_ids)))
+        ))
+    Recipe.objects.filter(pk__gte=recipe_ids[0]).recount_counters()
+    refresh_shopping_lists(user_ids)
+    invalidate_indexes()
+    return {
+        'users': user_ids,
+        'tags': tag_ids,
+        'ingredients': ingredient_ids,
+        'recipes': recipe_ids,
+    }
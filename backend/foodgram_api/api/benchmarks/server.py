@@ -0,0 +1,19 @@
+import os
+from functools import partial
+
+from django.db.backends.signals import connection_created
+
+from foodgram_api.asgi import application as asgi_application
+from foodgram_api.wsgi import application as wsgi_application
+from .runner import DB_DELAY_ENV, delay_query
+
+
+def install_delay(sender, connection, **kwargs):
+    connection.execute_wrappers.append(
+        partial(delay_query, float(os.environ[DB_DELAY_ENV])))
+
+
+if float(os.environ.get(DB_DELAY_ENV) or 0):
+    connection_created.connect(install_delay)
+
+__all__ = ('asgi_application', 'wsgi_application')
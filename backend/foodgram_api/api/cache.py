@@ -0,0 +1,102 @@
+import time
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def is_process_local(backend):
+    return isinstance(backend, PROCESS_LOCAL_BACKENDS)
+
+
+class CatalogCache:
+
+    def __init__(self, name):
+        self.name = name
+        self.version_key = f'catalog:{name}:version'
+        self._lock = Lock()
+        self._local = {}
+
+    @property
+    def backend(self):
+        return caches[settings.CATALOG_CACHE_ALIAS]
+
+    def is_expired(self, built_at):
+        timeout = settings.CATALOG_LOCAL_TIMEOUT
+        return (
+            bool(timeout) and is_process_local(self.backend)
+            and time.monotonic() - built_at > timeout)
+
+    def get_version(self):
+        with self._lock:
+            expired = any(
+                self.is_expired(built_at)
+                for _, _, built_at in self._local.values())
+            if expired:
+                self._local.clear()
+        if expired:
+            return self.bump()
+        version = self.backend.get(self.version_key)
+        if version is None:
+            self.backend.add(self.version_key, time.time_ns(), timeout=None)
+            version = self.backend.get(self.version_key)
+        return version
+
+    def bump(self):
+        try:
+            return self.backend.incr(self.version_key)
+        except ValueError:
+            self.backend.add(self.version_key, time.time_ns(), timeout=None)
+            return self.backend.get(self.version_key)
+
+    def get(self, key, builder, shared=False):
+        version = self.get_version()
+        with self._lock:
+            cached = self._local.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        shared_key = f'catalog:{self.name}:{version}:{key}'
+        value = self.backend.get(shared_key) if shared else None
+        if value is None:
+            value = builder()
+            if shared:
+                self.backend.set(shared_key, value, timeout=None)
+        with self._lock:
+            self._local[key] = (version, value, time.monotonic())
+        return value
+
+    def get_etag(self):
+        return f'"{self.name}-{self.get_version()}"'
+
+
+def get_versions(names):
+    catalogs = [CatalogCache(name) for name in names]
+    if not catalogs:
+        return []
+    found = catalogs[0].backend.get_many(
+        [catalog.version_key for catalog in catalogs])
+    return [
+        found.get(catalog.version_key) or catalog.get_version()
+        for catalog in catalogs
+    ]
+
+
+def bump_versions(names):
+    catalogs = [CatalogCache(name) for name in names]
+
+    def bump():
+        for catalog in catalogs:
+            catalog.bump()
+    transaction.on_commit(bump)
+
+
+tag_catalog = CatalogCache('tags')
+ingredient_catalog = CatalogCache('ingredients')
+recipe_search_catalog = CatalogCache('recipe_search')
+recipe_catalog = CatalogCache('recipes')
+recipe_detail_catalog = CatalogCache('recipe_details')
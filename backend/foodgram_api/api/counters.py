@@ -0,0 +1,19 @@
+from .db import PendingChanges
+from .models import Recipe
+
+
+class RecipeCounterChanges(PendingChanges):
+    connection_attribute = 'recipe_counter_changes'
+
+    def __init__(self, hooks=None):
+        super().__init__(hooks)
+        self.recipe_ids = set()
+
+    def __call__(self):
+        Recipe.objects.filter(pk__in=self.recipe_ids).recount_counters()
+
+
+def recipe_counters_changed(recipe_ids):
+    changes = RecipeCounterChanges.current()
+    changes.recipe_ids.update(recipe_ids)
+    changes.schedule()
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.db import connections, transaction
+
+
+def check_connections():
+    if not settings.DB_CONN_HEALTH_CHECKS:
+        return
+    for connection in connections.all():
+        if connection.connection is not None and not connection.is_usable():
+            connection.close()
+
+
+class PendingChanges:
+    connection_attribute = None
+
+    def __init__(self, hooks=None):
+        self.hooks = hooks
+        self.scheduled = False
+
+    @classmethod
+    def current(cls):
+        connection = transaction.get_connection()
+        changes = getattr(connection, cls.connection_attribute, None)
+        if (not connection.in_atomic_block or changes is None
+                or changes.hooks is not connection.run_on_commit):
+            changes = cls(connection.run_on_commit)
+            setattr(connection, cls.connection_attribute, changes)
+        return changes
+
+    def schedule(self):
+        if not self.scheduled:
+            self.scheduled = True
+            transaction.on_commit(self.run)
+
+    def run(self):
+        self.hooks = None
+        self()
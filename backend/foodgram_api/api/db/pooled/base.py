@@ -0,0 +1,90 @@
+from threading import BoundedSemaphore, Lock
+
+from django.conf import settings
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+pools = {}
+pools_lock = Lock()
+
+
+class ConnectionPool:
+
+    def __init__(self, size, timeout):
+        self.timeout = timeout
+        self._slots = BoundedSemaphore(size)
+        self._lock = Lock()
+        self._idle = []
+
+    def is_alive(self, connection):
+        if connection.closed:
+            return False
+        if not settings.DB_CONN_HEALTH_CHECKS:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except base.Database.Error:
+            connection.close()
+            return False
+        return True
+
+    def acquire(self, connect):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise base.Database.OperationalError(
+                'Нет свободных соединений в пуле')
+        try:
+            while True:
+                with self._lock:
+                    if not self._idle:
+                        break
+                    connection = self._idle.pop()
+                if self.is_alive(connection):
+                    return connection
+            return connect()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, connection):
+        try:
+            if connection.closed:
+                return
+            status = connection.info.transaction_status
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                connection.close()
+                return
+            if status != extensions.TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+            with self._lock:
+                self._idle.append(connection)
+        finally:
+            self._slots.release()
+
+
+def get_pool(alias, settings_dict):
+    with pools_lock:
+        if alias not in pools:
+            pools[alias] = ConnectionPool(
+                settings_dict.get('POOL_SIZE', 10),
+                settings_dict.get('POOL_TIMEOUT', 30))
+        return pools[alias]
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict)
+
+    def get_new_connection(self, conn_params):
+        connection = self.pool.acquire(
+            lambda: super(DatabaseWrapper, self).get_new_connection(
+                conn_params))
+        self.isolation_level = connection.isolation_level
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.release(self.connection)
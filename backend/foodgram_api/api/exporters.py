@@ -0,0 +1,52 @@
+import csv
+import json
+
+CHUNK_SIZE = 500
+
+
+class Echo:
+
+    def write(self, value):
+        return value
+
+
+def iter_rows(shopping_list):
+    return shopping_list.values_list(
+        'ingredient__name', 'amount', 'ingredient__measurement_unit'
+    ).iterator(chunk_size=CHUNK_SIZE)
+
+
+def export_txt(rows):
+    for name, total, measurement_unit in rows:
+        yield f'{name} {total} {measurement_unit}\n'
+
+
+def export_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(('name', 'amount', 'measurement_unit'))
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def export_json(rows):
+    yield '['
+    separator = ''
+    for name, total, measurement_unit in rows:
+        item = json.dumps(
+            {
+                'name': name,
+                'amount': total,
+                'measurement_unit': measurement_unit,
+            },
+            ensure_ascii=False,
+        )
+        yield f'{separator}{item}'
+        separator = ','
+    yield ']'
+
+
+EXPORT_FORMATS = {
+    'txt': ('text/plain; charset=utf-8', export_txt),
+    'csv': ('text/csv; charset=utf-8', export_csv),
+    'json': ('application/json', export_json),
+}
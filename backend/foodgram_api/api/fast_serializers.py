@@ -0,0 +1,114 @@
+from collections import defaultdict
+
+from django.db.models import BooleanField, Exists, OuterRef, Value
+
+from users.models import Follow, User
+from users.serializers import UserSerializer
+from .images import build_image_url
+from .models import RecipeIngredient, Tag
+from .serializers import (RecipeIngredientsSerializer, RecipeReadSerializer,
+                          SubscribeSerializer, TagSerializer)
+
+RECIPE_COLUMNS = (
+    'id', 'author_id', 'name', 'image', 'image_variants', 'text',
+    'cooking_time', 'is_favorited', 'is_in_shopping_cart',
+    'date_of_creation',
+)
+AUTHOR_FIELDS = tuple(
+    name for name in UserSerializer.Meta.fields if name != 'password')
+
+
+def group_rows(queryset, key, columns, fields):
+    groups = defaultdict(list)
+    for key_value, *values in queryset.values_list(key, *columns):
+        groups[key_value].append(dict(zip(fields, values)))
+    return groups
+
+
+def recipe_rows(queryset, fields=None):
+    columns = RECIPE_COLUMNS
+    if fields is not None and 'text' not in fields:
+        columns = tuple(column for column in columns if column != 'text')
+    return queryset.prefetch_related(None).values(*columns)
+
+
+def get_authors(user, author_ids):
+    is_subscribe = Value(False, output_field=BooleanField())
+    if not user.is_anonymous:
+        is_subscribe = Exists(Follow.objects.filter(
+            user=user, author=OuterRef('pk')))
+    return {
+        row[1]: dict(zip(AUTHOR_FIELDS, row))
+        for row in User.objects.filter(pk__in=author_ids).annotate(
+            is_subscribe=is_subscribe).values_list(*AUTHOR_FIELDS)
+    }
+
+
+def serialize_recipes(rows, context):
+    request = context['request']
+    fields = context.get('fields') or RecipeReadSerializer.Meta.fields
+    variant = context.get('image_variant', 'full')
+    recipe_ids = [row['id'] for row in rows]
+    tags = ingredients = authors = {}
+    if 'tags' in fields:
+        tags = group_rows(
+            Tag.objects.filter(recipe__in=recipe_ids), 'recipe',
+            TagSerializer.Meta.fields, TagSerializer.Meta.fields)
+    if 'ingredients' in fields:
+        ingredients = group_rows(
+            RecipeIngredient.objects.filter(recipe__in=recipe_ids),
+            'recipe', ('ingredient_id', 'ingredient__name',
+                       'ingredient__measurement_unit', 'amount'),
+            RecipeIngredientsSerializer.Meta.fields)
+    if 'author' in fields:
+        authors = get_authors(
+            request.user, {row['author_id'] for row in rows})
+    getters = {
+        'id': lambda row: row['id'],
+        'tags': lambda row: tags.get(row['id'], []),
+        'author': lambda row: authors[row['author_id']],
+        'ingredients': lambda row: ingredients.get(row['id'], []),
+        'is_favorited': lambda row: row['is_favorited'],
+        'is_in_shopping_cart': lambda row: row['is_in_shopping_cart'],
+        'name': lambda row: row['name'],
+        'image': lambda row: build_image_url(
+            row['image'], row['image_variants'], variant, request),
+        'text': lambda row: row['text'],
+        'cooking_time': lambda row: row['cooking_time'],
+    }
+    selected = [
+        (name, getters[name]) for name in RecipeReadSerializer.Meta.fields
+        if name in fields
+    ]
+    return [{name: get(row) for name, get in selected} for row in rows]
+
+
+def subscription_rows(queryset):
+    return queryset.prefetch_related(None).values(
+        'id', 'author_id', 'author__email', 'author__username',
+        'author__first_name', 'author__last_name', 'recipes_count')
+
+
+def serialize_subscriptions(rows, recipes, request):
+    author_recipes = defaultdict(list)
+    for author_id, pk, name, image, image_variants, cooking_time in (
+            recipes.filter(author__in=[row['author_id'] for row in rows])
+            .values_list('author_id', 'id', 'name', 'image',
+                         'image_variants', 'cooking_time')):
+        author_recipes[author_id].append({
+            'id': pk,
+            'name': name,
+            'image': build_image_url(
+                image, image_variants, 'thumbnail', request),
+            'cooking_time': str(cooking_time),
+        })
+    is_subscribe = not request.user.is_anonymous
+    return [
+        dict(zip(SubscribeSerializer.Meta.fields, (
+            row['author__email'], row['author_id'], row['author__username'],
+            row['author__first_name'], row['author__last_name'],
+            is_subscribe, author_recipes.get(row['author_id'], []),
+            row['recipes_count'],
+        )))
+        for row in rows
+    ]
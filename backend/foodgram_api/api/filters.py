@@ -1,44 +1,85 @@
+from django.db.models import Exists, OuterRef
 from django.shortcuts import get_object_or_404
 from django_filters import filters
 from django_filters.rest_framework import FilterSet
-from rest_framework.filters import SearchFilter
+from rest_framework.filters import BaseFilterBackend
 
 from users.models import User
-from .models import Recipe, Tag
+from .models import FavoriteRecipe, Recipe, ShoppingCart, Tag
+from .search import search_ingredients, search_recipes
 
 
-class IngredientSearchFilter(SearchFilter):
+class IngredientSearchFilter(BaseFilterBackend):
     search_param = 'name'
 
+    def filter_queryset(self, request, queryset, view):
+        value = request.query_params.get(self.search_param, '').strip()
+        if not value or view.action != 'list':
+            return queryset
+        return search_ingredients(queryset, value)
+
 
 class RecipeFilter(FilterSet):
     tags = filters.ModelMultipleChoiceFilter(
         field_name='tags__slug',
         queryset=Tag.objects.all(),
         to_field_name='slug',
+        method='filter_tags',
     )
     author = filters.NumberFilter(method='filter_author')
     is_favorited = filters.NumberFilter(method='filter_is_favorited')
     is_in_shopping_cart = filters.NumberFilter(
         method='filter_is_in_shopping_cart'
     )
+    search = filters.CharFilter(method='filter_search')
+    ordering = filters.ChoiceFilter(
+        choices=(
+            ('popularity', 'popularity'),
+            ('-popularity', '-popularity'),
+        ),
+        method='filter_ordering',
+    )
 
     class Meta:
         model = Recipe
         fields = ('tags',)
 
+    def filter_tags(self, queryset, name, value):
+        if not value:
+            return queryset
+        return queryset.filter(Exists(Recipe.tags.through.objects.filter(
+            recipe=OuterRef('pk'), tag__in=value)))
+
     def filter_author(self, queryset, name, value):
         if value:
             author = get_object_or_404(User, id=value)
             return queryset.filter(author=author)
         return queryset
 
+    def filter_user_recipes(self, queryset, model):
+        user = self.request.user
+        if user.is_anonymous:
+            return queryset.none()
+        return queryset.filter(Exists(model.objects.filter(
+            user=user, recipe=OuterRef('pk'))))
+
     def filter_is_favorited(self, queryset, name, value):
         if value == 1:
-            return self.request.user.favorite_recipes.all()
+            return self.filter_user_recipes(queryset, FavoriteRecipe)
         return queryset
 
     def filter_is_in_shopping_cart(self, queryset, name, value):
         if value == 1:
-            return self.request.user.shopping_cart_recipes.all()
+            return self.filter_user_recipes(queryset, ShoppingCart)
         return queryset
+
+    def filter_search(self, queryset, name, value):
+        value = value.strip()
+        if not value:
+            return queryset
+        return search_recipes(queryset, value)
+
+    def filter_ordering(self, queryset, name, value):
+        if value == '-popularity':
+            return queryset.popular()
+        return queryset.popular().reverse()
@@ -0,0 +1,94 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from PIL import Image
+
+from .cache import bump_versions, recipe_catalog
+from .models import Recipe
+
+logger = logging.getLogger(__name__)
+
+IMAGE_VARIANTS = {
+    'thumbnail': (160, 160),
+    'card': (480, 480),
+    'full': (1280, 1280),
+}
+IMAGE_FORMATS = {
+    'jpeg': 'JPEG',
+    'webp': 'WEBP',
+}
+IMAGE_QUALITY = 80
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.IMAGE_WORKERS, thread_name_prefix='recipe-images')
+
+
+def get_variant_name(name, variant, extension):
+    stem, _ = os.path.splitext(os.path.basename(name))
+    return f'variants/{stem}_{variant}.{extension}'
+
+
+def build_image_variants(recipe_id, name, stale_variants=None):
+    storage = Recipe._meta.get_field('image').storage
+    try:
+        with storage.open(name) as source:
+            image = Image.open(source)
+            image.load()
+        image = image.convert('RGB')
+        variants = {}
+        for variant, size in IMAGE_VARIANTS.items():
+            resized = image.copy()
+            resized.thumbnail(size)
+            for extension, image_format in IMAGE_FORMATS.items():
+                buffer = BytesIO()
+                resized.save(buffer, image_format, quality=IMAGE_QUALITY)
+                variants.setdefault(variant, {})[extension] = storage.save(
+                    get_variant_name(name, variant, extension),
+                    ContentFile(buffer.getvalue()))
+        Recipe.objects.filter(pk=recipe_id, image=name).update(
+            image_variants=variants)
+        bump_versions((recipe_catalog.name, f'recipe:{recipe_id}'))
+        for formats in (stale_variants or {}).values():
+            for stale_name in formats.values():
+                storage.delete(stale_name)
+    except Exception:
+        logger.exception('Не удалось обработать картинку рецепта %s',
+                         recipe_id)
+
+
+def build_image_variants_in_worker(*args):
+    try:
+        build_image_variants(*args)
+    finally:
+        connections.close_all()
+
+
+def schedule_image_variants(recipe, stale_variants=None):
+    name = recipe.image.name
+    transaction.on_commit(lambda: executor.submit(
+        build_image_variants_in_worker, recipe.pk, name, stale_variants))
+
+
+def get_image_url(recipe, variant, request=None):
+    return build_image_url(
+        recipe.image.name, recipe.image_variants, variant, request)
+
+
+def build_image_url(name, image_variants, variant, request=None):
+    if not name:
+        return None
+    formats = image_variants.get(variant)
+    if formats:
+        image_format = 'jpeg'
+        if request is not None:
+            image_format = request.query_params.get('image_format', 'jpeg')
+        name = formats.get(image_format, formats['jpeg'])
+    url = Recipe._meta.get_field('image').storage.url(name)
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
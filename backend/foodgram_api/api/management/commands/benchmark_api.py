@@ -0,0 +1,103 @@
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from api.benchmarks.endpoints import ENDPOINTS
+from api.benchmarks.runner import (DB_DELAY_ENV, build_context,
+                                   delay_queries, format_results,
+                                   gunicorn_server, results_to_json,
+                                   run_over_http, run_with_client)
+from api.benchmarks.seed import rolled_back, seed_dataset
+from api.models import Ingredient, Tag
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу тестовыми данными и замеряет задержку, '
+            'пропускную способность и количество SQL-запросов для каждого '
+            'эндпоинта API. Завершается с ошибкой, если эндпоинт превысил '
+            'свой бюджет запросов или вернул неожиданный статус.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--requests', type=int, default=20,
+                            help='Количество запросов к каждому эндпоинту.')
+        parser.add_argument('--only', default='',
+                            help='Замерять только эндпоинты, в названии '
+                                 'которых есть эта строка.')
+        parser.add_argument('--gunicorn', action='store_true',
+                            help='Замерять GET-эндпоинты через локальный '
+                                 'gunicorn. Данные сохраняются в базу на '
+                                 'время замера и затем удаляются.')
+        parser.add_argument('--asgi', action='store_true',
+                            help='Вместе с --gunicorn: сравнить обычные '
+                                 'воркеры с ASGI-воркерами uvicorn.')
+        parser.add_argument('--db-delay', type=float, default=0,
+                            help='Задержка каждого SQL-запроса во время '
+                                 'замера в секундах, имитирует медленную '
+                                 'базу.')
+        parser.add_argument('--no-response-cache', action='store_true',
+                            help='Отключить кэш ответов, чтобы каждый '
+                                 'запрос доходил до базы.')
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--json', dest='json_path',
+                            help='Сохранить результаты в JSON-файл.')
+
+    def seed(self, options):
+        self.stdout.write('Заполнение базы...')
+        return seed_dataset(
+            users=options['users'], recipes=options['recipes'])
+
+    def cleanup(self, seeded):
+        User.objects.filter(username='benchmark').delete()
+        for model, key in ((User, 'users'), (Tag, 'tags'),
+                           (Ingredient, 'ingredients')):
+            model.objects.filter(pk__in=seeded[key]).delete()
+
+    def handle(self, *args, **options):
+        endpoints = [
+            endpoint for endpoint in ENDPOINTS
+            if options['only'] in endpoint.name
+        ]
+        cache_timeout = 0 if options['no_response_cache'] else (
+            settings.RESPONSE_CACHE_TIMEOUT)
+        if options['gunicorn']:
+            seeded = self.seed(options)
+            modes = ('wsgi', 'asgi') if options['asgi'] else ('wsgi',)
+            results = []
+            try:
+                context = build_context(seeded)
+                for mode in modes:
+                    with gunicorn_server(
+                            options['port'], options['workers'], mode,
+                            {DB_DELAY_ENV: str(options['db_delay']),
+                             'RESPONSE_CACHE_TIMEOUT': str(cache_timeout)}
+                    ) as base_url:
+                        results += run_over_http(
+                            [endpoint for endpoint in endpoints
+                             if endpoint.is_safe],
+                            context, options['requests'], base_url,
+                            options['concurrency'],
+                            mode if options['asgi'] else None)
+            finally:
+                self.cleanup(seeded)
+        else:
+            with rolled_back(), override_settings(
+                    RESPONSE_CACHE_TIMEOUT=cache_timeout):
+                context = build_context(self.seed(options))
+                delay = options['db_delay']
+                with delay_queries(delay) if delay else nullcontext():
+                    results = run_with_client(
+                        endpoints, context, options['requests'])
+        self.stdout.write(format_results(results))
+        if options['json_path']:
+            with open(options['json_path'], 'w') as output:
+                output.write(results_to_json(results))
+        failed = [result.name for result in results if result.failed]
+        if failed:
+            raise CommandError(f'Не прошли проверку: {", ".join(failed)}')
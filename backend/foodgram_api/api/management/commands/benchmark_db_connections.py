@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.db.utils import ConnectionHandler
+
+POOLED_ENGINE = 'api.db.pooled'
+
+
+def measure(settings_dict, requests, health_checks=False):
+    handler = ConnectionHandler({DEFAULT_DB_ALIAS: settings_dict})
+    database = handler[DEFAULT_DB_ALIAS]
+    timings = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        database.close_if_unusable_or_obsolete()
+        if health_checks and database.connection is not None:
+            database.is_usable()
+        with database.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        database.close_if_unusable_or_obsolete()
+        timings.append((time.perf_counter() - started) * 1000)
+    database.close()
+    return sorted(timings)
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает время обработки запроса к базе при новом '
+            'соединении на каждый запрос, постоянных соединениях '
+            '(CONN_MAX_AGE) и пуле соединений.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+
+    def handle(self, *args, **options):
+        base = {
+            key: value for key, value in connection.settings_dict.items()
+            if key != 'TEST'
+        }
+        modes = [
+            ('новое соединение', {**base, 'CONN_MAX_AGE': 0}, False),
+            ('постоянное соединение', {**base, 'CONN_MAX_AGE': None}, False),
+            ('постоянное + проверка', {**base, 'CONN_MAX_AGE': None}, True),
+        ]
+        if connection.vendor == 'postgresql':
+            modes.append((
+                'пул соединений',
+                {**base, 'ENGINE': POOLED_ENGINE, 'CONN_MAX_AGE': 0},
+                False,
+            ))
+        self.stdout.write(
+            f'{"режим":24} {"p50 ms":>8} {"p95 ms":>8} {"сэкономлено ms":>15}')
+        baseline = None
+        for name, settings_dict, health_checks in modes:
+            timings = measure(
+                settings_dict, options['requests'], health_checks)
+            p50 = timings[len(timings) // 2]
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            if baseline is None:
+                baseline = p50
+            self.stdout.write(
+                f'{name:24} {p50:8.2f} {p95:8.2f} {baseline - p50:15.2f}')
@@ -0,0 +1,87 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.cache import ingredient_catalog
+from api.models import Ingredient
+from api.search import search_ingredients
+
+SYLLABLES = (
+    'ка', 'ро', 'ми', 'ла', 'то', 'ны', 'све', 'кла', 'мо', 'ре',
+    'ба', 'тат', 'пер', 'ец', 'лук', 'сы', 'го', 'рох', 'ва', 'ни',
+)
+UNITS = ('г', 'кг', 'мл', 'л', 'шт', 'ст. л.', 'ч. л.', 'по вкусу')
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Замеряет поиск ингредиентов по префиксу на сгенерированном '
+            'каталоге. Все созданные записи откатываются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000)
+        parser.add_argument('--queries', type=int, default=500)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def generate_names(self, rows, rng):
+        names = set()
+        while len(names) < rows:
+            names.add(''.join(
+                rng.choice(SYLLABLES) for _ in range(rng.randint(2, 5))))
+        return sorted(names)
+
+    def measure(self, search, prefixes):
+        timings = []
+        for prefix in prefixes:
+            started = time.perf_counter()
+            search(prefix)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return (
+            statistics.mean(timings),
+            timings[int(len(timings) * 0.95) - 1],
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        names = self.generate_names(options['rows'], rng)
+        prefixes = [
+            rng.choice(names)[:rng.randint(1, 4)]
+            for _ in range(options['queries'])
+        ]
+        try:
+            with transaction.atomic():
+                Ingredient.objects.bulk_create(
+                    (Ingredient(name=name, measurement_unit=rng.choice(UNITS))
+                     for name in names),
+                    batch_size=5000,
+                    ignore_conflicts=True,
+                )
+                ingredient_catalog.bump()
+                queryset = Ingredient.objects.all()
+                results = {
+                    'istartswith (SearchFilter)': self.measure(
+                        lambda prefix: list(
+                            queryset.filter(name__istartswith=prefix)),
+                        prefixes),
+                    'search_ingredients': self.measure(
+                        lambda prefix: list(
+                            search_ingredients(queryset, prefix)),
+                        prefixes),
+                }
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            ingredient_catalog.bump()
+        self.stdout.write(
+            f'{options["rows"]} ингредиентов, {options["queries"]} запросов')
+        for name, (mean, p95) in results.items():
+            self.stdout.write(f'{name:30} mean {mean:8.2f} ms  '
+                              f'p95 {p95:8.2f} ms')
@@ -0,0 +1,111 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.benchmarks.seed import rolled_back, seed_dataset
+from api.fast_serializers import (recipe_rows, serialize_recipes,
+                                  serialize_subscriptions, subscription_rows)
+from api.renderers import FastJSONRenderer, orjson
+from api.serializers import RecipeReadSerializer, SubscribeSerializer
+from api.views import RecipeViewSet, SubscribeListViewSet
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает сериализаторы списка рецептов и подписок с быстрой '
+            'сериализацией из .values() и рендер JSON через orjson. '
+            'Проверяет, что ответы совпадают побайтно. Все созданные '
+            'записи откатываются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=5000)
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--limit', type=int, default=100,
+                            help='Сколько объектов сериализовать за раз.')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def measure(self, build, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = build()
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return result, (
+            statistics.mean(timings),
+            timings[max(int(len(timings) * 0.95) - 1, 0)],
+        )
+
+    def make_request(self, path, user):
+        request = Request(APIRequestFactory().get(path))
+        request.user = user
+        return request
+
+    def get_cases(self, user, limit):
+        request = self.make_request(f'/api/recipes/?limit={limit}', user)
+        recipes = RecipeViewSet(
+            request=request, action='list', format_kwarg=None, kwargs={})
+        context = recipes.get_serializer_context()
+        request = self.make_request(
+            '/api/users/subscriptions/?recipes_limit=3', user)
+        subscriptions = SubscribeListViewSet(
+            request=request, action='list', format_kwarg=None, kwargs={})
+        return {
+            'recipes': (
+                lambda: RecipeReadSerializer(
+                    list(recipes.get_queryset()[:limit]), many=True,
+                    context=context).data,
+                lambda: serialize_recipes(
+                    list(recipe_rows(recipes.get_queryset())[:limit]),
+                    context),
+            ),
+            'subscriptions': (
+                lambda: SubscribeSerializer(
+                    list(subscriptions.get_queryset()[:limit]), many=True,
+                    context={'request': request}).data,
+                lambda: serialize_subscriptions(
+                    list(subscription_rows(
+                        subscriptions.get_queryset())[:limit]),
+                    subscriptions.get_recipes(), request),
+            ),
+        }
+
+    def write_row(self, name, timings, baseline=None):
+        mean, p95 = timings
+        speedup = f'  x{baseline[0] / mean:.1f}' if baseline else ''
+        self.stdout.write(
+            f'{name:36} mean {mean:8.2f} ms  p95 {p95:8.2f} ms{speedup}')
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        with rolled_back():
+            seeded = seed_dataset(
+                users=options['users'], recipes=options['recipes'])
+            user = User.objects.get(pk=seeded['users'][0])
+            cases = self.get_cases(user, options['limit'])
+            for name, (standard, fast) in cases.items():
+                data, standard_timings = self.measure(standard, repeat)
+                fast_data, fast_timings = self.measure(fast, repeat)
+                content = JSONRenderer().render(data)
+                if JSONRenderer().render(fast_data) != content:
+                    raise CommandError(
+                        f'{name}: быстрая сериализация дала другой ответ')
+                fast_content, render_timings = self.measure(
+                    lambda: FastJSONRenderer().render(data), repeat)
+                if fast_content != content:
+                    raise CommandError(
+                        f'{name}: FastJSONRenderer дал другой ответ')
+                _, json_timings = self.measure(
+                    lambda: JSONRenderer().render(data), repeat)
+                self.stdout.write(
+                    f'{name}: {len(data)} объектов, {len(content)} байт')
+                self.write_row('  serializer', standard_timings)
+                self.write_row('  .values()', fast_timings, standard_timings)
+                self.write_row('  JSONRenderer', json_timings)
+                self.write_row(
+                    '  FastJSONRenderer' + ('' if orjson else ' (json)'),
+                    render_timings, json_timings)
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from api.images import build_image_variants
+from api.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Создаёт уменьшенные копии картинок рецептов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересоздать копии и для рецептов, у которых они уже есть.')
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image='')
+        if not options['all']:
+            recipes = recipes.filter(image_variants={})
+        processed = 0
+        for pk, name, variants in recipes.values_list(
+                'pk', 'image', 'image_variants').iterator():
+            build_image_variants(pk, name, variants)
+            processed += 1
+        self.stdout.write(f'Обработано картинок: {processed}')
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from api.recommendations import (CART_WEIGHT, NEIGHBOURS,
+                                 build_recipe_neighbours)
+
+
+class Command(BaseCommand):
+    help = ('Строит таблицу похожих рецептов по совместным добавлениям '
+            'в избранное и в список покупок. Запускайте по расписанию.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--neighbours', type=int, default=NEIGHBOURS,
+                            help='Сколько похожих рецептов хранить '
+                                 'для каждого рецепта.')
+        parser.add_argument('--cart-weight', type=float,
+                            default=CART_WEIGHT,
+                            help='Вес добавления в список покупок '
+                                 'относительно избранного.')
+
+    def handle(self, *args, **options):
+        created = build_recipe_neighbours(
+            options['neighbours'], options['cart_weight'])
+        self.stdout.write(f'Сохранено пар похожих рецептов: {created}')
@@ -0,0 +1,83 @@
+import re
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api.benchmarks.seed import rolled_back, seed_dataset
+from api.filters import RecipeFilter
+from api.models import Recipe, Tag
+from users.models import User
+
+FULL_SCAN_PATTERNS = {
+    'postgresql': re.compile(
+        r'Seq Scan on (api_recipe|api_recipe_tags|api_favoriterecipe|'
+        r'api_shoppingcart|api_recipeingredient)\b'),
+    'sqlite': re.compile(r'\bSCAN (\w+)$'),
+}
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу тестовыми данными, выполняет EXPLAIN для '
+            'запросов фильтрации рецептов и проверяет, что они используют '
+            'индексы. Все созданные записи откатываются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=20000)
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--show-plans', action='store_true')
+
+    def filtered(self, user, **data):
+        return RecipeFilter(
+            data=data,
+            queryset=Recipe.objects.all(),
+            request=SimpleNamespace(user=user),
+        ).qs
+
+    def get_queries(self, seeded):
+        user = User.objects.get(pk=seeded['users'][0])
+        tags = list(Tag.objects.filter(
+            pk__in=seeded['tags'][:2]).values_list('slug', flat=True))
+        word = Recipe.objects.get(pk=seeded['recipes'][0]).name.split()[0]
+        return {
+            'лента': Recipe.objects.all(),
+            'рецепты автора': self.filtered(user, author=user.pk),
+            'один тег': self.filtered(user, tags=tags[:1]),
+            'несколько тегов': self.filtered(user, tags=tags),
+            'избранное': self.filtered(user, is_favorited=1),
+            'список покупок': self.filtered(user, is_in_shopping_cart=1),
+            'избранное с тегом': self.filtered(
+                user, is_favorited=1, tags=tags[:1]),
+            'поиск': self.filtered(user, search=word),
+            'флаги пользователя': Recipe.objects.with_user_flags(user),
+        }
+
+    def handle(self, *args, **options):
+        pattern = FULL_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(
+                f'EXPLAIN не поддерживается для {connection.vendor}')
+        failures = []
+        with rolled_back():
+            seeded = seed_dataset(
+                users=options['users'], recipes=options['recipes'])
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            for name, queryset in self.get_queries(seeded).items():
+                plan = queryset[:6].explain()
+                scans = [
+                    match.group(1)
+                    for line in plan.splitlines()
+                    for match in [pattern.search(line.strip())]
+                    if match
+                ]
+                status = 'OK' if not scans else (
+                    f'полный просмотр: {", ".join(scans)}')
+                self.stdout.write(f'{name:20} {status}')
+                if options['show_plans'] or scans:
+                    self.stdout.write(plan)
+                if scans:
+                    failures.append(name)
+        if failures:
+            raise CommandError(
+                f'Запросы без индексов: {", ".join(failures)}')
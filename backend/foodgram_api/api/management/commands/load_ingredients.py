@@ -0,0 +1,122 @@
+import csv
+import io
+import json
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.cache import ingredient_catalog, is_process_local
+from api.models import Ingredient
+
+BATCH_SIZE = 5000
+HEADER = ('name', 'measurement_unit')
+NAME_LENGTH = Ingredient._meta.get_field('name').max_length
+UNIT_LENGTH = Ingredient._meta.get_field('measurement_unit').max_length
+
+
+def read_csv(file, skip_header=False):
+    for number, row in enumerate(csv.reader(file)):
+        if number == 0 and (skip_header or tuple(
+                value.strip().lower() for value in row[:2]) == HEADER):
+            continue
+        if len(row) >= 2:
+            yield row[0], row[1]
+
+
+def read_json(file, skip_header=False):
+    for item in json.load(file):
+        yield item.get('name', ''), item.get('measurement_unit', '')
+
+
+READERS = {'.csv': read_csv, '.json': read_json}
+
+
+def copy_ingredients(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            'CREATE TEMP TABLE ingredient_import '
+            '(name varchar(254), measurement_unit varchar(10)) '
+            'ON COMMIT DROP')
+        cursor.copy_expert(
+            'COPY ingredient_import FROM STDIN WITH (FORMAT csv)', buffer)
+        cursor.execute(
+            f'INSERT INTO {Ingredient._meta.db_table} '
+            '(name, measurement_unit) '
+            'SELECT name, measurement_unit FROM ingredient_import '
+            'ON CONFLICT DO NOTHING')
+        return cursor.rowcount
+
+
+def create_ingredients(rows):
+    return len(Ingredient.objects.bulk_create(
+        (Ingredient(name=name, measurement_unit=unit) for name, unit in rows),
+        ignore_conflicts=True))
+
+
+class Command(BaseCommand):
+    help = ('Загружает справочник ингредиентов из CSV или JSON файлов. '
+            'Повторная загрузка пропускает уже существующие ингредиенты.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', type=Path,
+                            help='Файлы .csv (название, единица измерения) '
+                                 'или .json (список объектов с полями '
+                                 'name и measurement_unit).')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help='Сколько ингредиентов сохранять за раз.')
+        parser.add_argument('--skip-header', action='store_true',
+                            help='Пропускать первую строку CSV файлов. '
+                                 'Заголовок name,measurement_unit '
+                                 'пропускается и без этого флага.')
+
+    def iter_new_rows(self, paths, skip_header):
+        seen = set(Ingredient.objects.values_list(
+            'name', 'measurement_unit').iterator())
+        for path in paths:
+            reader = READERS.get(path.suffix.lower())
+            if reader is None:
+                raise CommandError(
+                    f'{path}: поддерживаются только файлы '
+                    f'{", ".join(READERS)}')
+            with path.open(encoding='utf-8-sig', newline='') as file:
+                for name, unit in reader(file, skip_header):
+                    row = (str(name).strip(), str(unit).strip())
+                    if not all(row) or len(row[0]) > NAME_LENGTH or (
+                            len(row[1]) > UNIT_LENGTH):
+                        self.skipped += 1
+                    elif row not in seen:
+                        seen.add(row)
+                        yield row
+
+    def handle(self, *args, **options):
+        save = (copy_ingredients if connection.vendor == 'postgresql'
+                else create_ingredients)
+        self.skipped = 0
+        created = 0
+        rows = self.iter_new_rows(options['paths'], options['skip_header'])
+        while True:
+            batch = list(islice(rows, options['batch_size']))
+            if not batch:
+                break
+            created += save(batch)
+            self.stdout.write(f'Добавлено ингредиентов: {created}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово. Добавлено: {created}, '
+            f'пропущено некорректных строк: {self.skipped}'))
+        if not created:
+            return
+        ingredient_catalog.bump()
+        if not is_process_local(ingredient_catalog.backend):
+            return
+        timeout = settings.CATALOG_LOCAL_TIMEOUT
+        when = (f'в течение {timeout} с, сразу - только '
+                if timeout else 'только ')
+        self.stdout.write(self.style.WARNING(
+            'Кэш хранится в памяти процесса: запущенный сервер покажет '
+            f'новые ингредиенты {when}после перезапуска.'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from api.models import Recipe
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счётчики добавлений рецептов в избранное '
+            'и в список покупок.')
+
+    def handle(self, *args, **options):
+        updated = Recipe.objects.recount_counters()
+        self.stdout.write(f'Пересчитано рецептов: {updated}')
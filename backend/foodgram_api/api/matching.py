@@ -0,0 +1,128 @@
+import heapq
+import time
+from array import array
+from collections import Counter, defaultdict
+from threading import Lock
+
+from django.db import transaction
+
+from .cache import CatalogCache
+from .models import RecipeIngredient
+
+MATCH_LIMIT = 500
+MAX_REPLAYED_CHANGES = 1000
+CHANGE_LOG_TIMEOUT = 60 * 60 * 24
+
+
+class RecipeIngredientIndex:
+
+    def __init__(self, rows):
+        recipes = defaultdict(list)
+        for recipe_id, ingredient_id in rows:
+            recipes[recipe_id].append(ingredient_id)
+        self.recipes = {}
+        self.postings = defaultdict(lambda: array('q'))
+        for recipe_id, ingredient_ids in recipes.items():
+            self.add(recipe_id, ingredient_ids)
+
+    @classmethod
+    def build(cls):
+        return cls(RecipeIngredient.objects.values_list(
+            'recipe_id', 'ingredient_id').iterator())
+
+    def add(self, recipe_id, ingredient_ids):
+        ingredient_ids = tuple(set(ingredient_ids))
+        if not ingredient_ids:
+            return
+        self.recipes[recipe_id] = ingredient_ids
+        for ingredient_id in ingredient_ids:
+            self.postings[ingredient_id].append(recipe_id)
+
+    def remove(self, recipe_id):
+        for ingredient_id in self.recipes.pop(recipe_id, ()):
+            self.postings[ingredient_id].remove(recipe_id)
+
+    def update(self, recipes):
+        for recipe_id, ingredient_ids in recipes.items():
+            self.remove(recipe_id)
+            self.add(recipe_id, ingredient_ids)
+
+    def match(self, ingredient_ids, limit=MATCH_LIMIT):
+        hits = Counter()
+        for ingredient_id in set(ingredient_ids):
+            hits.update(self.postings.get(ingredient_id, ()))
+        recipes = self.recipes
+        return [
+            (recipe_id, hits[recipe_id] / len(recipes[recipe_id]))
+            for recipe_id in heapq.nlargest(limit, hits, key=lambda pk: (
+                hits[pk] / len(recipes[pk]), hits[pk], pk))
+        ]
+
+
+class IncrementalRecipeIngredientIndex:
+
+    def __init__(self, name):
+        self.catalog = CatalogCache(name)
+        self._lock = Lock()
+        self._index = None
+        self._version = None
+        self._built_at = None
+
+    def get_change_key(self, version):
+        return f'catalog:{self.catalog.name}:changes:{version}'
+
+    def get_changes(self, version):
+        if self._index is None or not (
+                0 < version - self._version <= MAX_REPLAYED_CHANGES):
+            return None
+        changed = set()
+        for number in range(self._version + 1, version + 1):
+            recipe_ids = self.catalog.backend.get(
+                self.get_change_key(number))
+            if recipe_ids is None:
+                return None
+            changed.update(recipe_ids)
+        return changed
+
+    def get(self):
+        version = self.catalog.get_version()
+        with self._lock:
+            if self._index is not None and version == self._version:
+                if not self.catalog.is_expired(self._built_at):
+                    return self._index
+                version = self.catalog.bump()
+                self._index = None
+            changed = self.get_changes(version)
+            if changed is None:
+                self._index = RecipeIngredientIndex.build()
+                self._built_at = time.monotonic()
+            else:
+                recipes = {recipe_id: [] for recipe_id in changed}
+                for recipe_id, ingredient_id in (
+                        RecipeIngredient.objects.filter(
+                            recipe_id__in=changed).values_list(
+                            'recipe_id', 'ingredient_id')):
+                    recipes[recipe_id].append(ingredient_id)
+                self._index.update(recipes)
+            self._version = version
+            return self._index
+
+    def log_changes(self, recipe_ids):
+        version = self.catalog.bump()
+        self.catalog.backend.set(
+            self.get_change_key(version), list(recipe_ids),
+            timeout=CHANGE_LOG_TIMEOUT)
+
+    def invalidate(self):
+        self.catalog.bump()
+
+    def changed(self, recipe_ids):
+        recipe_ids = set(recipe_ids)
+        transaction.on_commit(lambda: self.log_changes(recipe_ids))
+
+    def match(self, ingredient_ids, limit=MATCH_LIMIT):
+        return self.get().match(ingredient_ids, limit)
+
+
+recipe_ingredient_index = IncrementalRecipeIngredientIndex(
+    'recipe_ingredients')
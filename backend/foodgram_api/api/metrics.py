@@ -0,0 +1,101 @@
+import sys
+from collections import defaultdict
+from threading import Lock
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+from rest_framework.fields import Field
+
+DURATION_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class ViewStats:
+
+    def __init__(self):
+        self.requests = defaultdict(int)
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.duration = 0
+        self.queries = 0
+        self.db_duration = 0
+        self.duplicate_queries = 0
+
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self._lock = Lock()
+        self._views = defaultdict(ViewStats)
+
+    def observe(self, view, method, status, duration, recorder):
+        with self._lock:
+            stats = self._views[view]
+            stats.requests[(method, status)] += 1
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    stats.buckets[index] += 1
+            stats.duration += duration
+            stats.queries += recorder.count
+            stats.db_duration += recorder.duration
+            stats.duplicate_queries += recorder.duplicates
+
+    def render(self):
+        lines = [
+            '# TYPE foodgram_requests_total counter',
+            '# TYPE foodgram_request_duration_seconds histogram',
+            '# TYPE foodgram_db_queries_total counter',
+            '# TYPE foodgram_db_duration_seconds_total counter',
+            '# TYPE foodgram_db_duplicate_queries_total counter',
+        ]
+        with self._lock:
+            for view, stats in sorted(self._views.items()):
+                label = f'view="{view}"'
+                total = 0
+                for (method, status), count in sorted(stats.requests.items()):
+                    total += count
+                    lines.append(
+                        f'foodgram_requests_total{{{label},method="{method}",'
+                        f'status="{status}"}} {count}')
+                for bound, count in zip(DURATION_BUCKETS, stats.buckets):
+                    lines.append(
+                        f'foodgram_request_duration_seconds_bucket'
+                        f'{{{label},le="{bound}"}} {count}')
+                lines += [
+                    f'foodgram_request_duration_seconds_bucket'
+                    f'{{{label},le="+Inf"}} {total}',
+                    f'foodgram_request_duration_seconds_sum{{{label}}} '
+                    f'{stats.duration:.6f}',
+                    f'foodgram_request_duration_seconds_count{{{label}}} '
+                    f'{total}',
+                    f'foodgram_db_queries_total{{{label}}} {stats.queries}',
+                    f'foodgram_db_duration_seconds_total{{{label}}} '
+                    f'{stats.db_duration:.6f}',
+                    f'foodgram_db_duplicate_queries_total{{{label}}} '
+                    f'{stats.duplicate_queries}',
+                ]
+        return '\n'.join(lines) + '\n'
+
+
+def get_field_path():
+    frame = sys._getframe(1)
+    while frame is not None:
+        field = frame.f_locals.get('self')
+        if isinstance(field, Field) and field.field_name:
+            return f'{type(field.parent).__name__}.{field.field_name}'
+        frame = frame.f_back
+    return None
+
+
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    if not token:
+        raise Http404
+    if not constant_time_compare(
+            request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse(
+            status=401, headers={'WWW-Authenticate': 'Bearer'})
+    return HttpResponse(
+        registry.render(), content_type='text/plain; version=0.0.4')
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from django.conf import settings
+
+from .metrics import get_field_path, registry
+
+logger = logging.getLogger(__name__)
+
+current_recorder = ContextVar('current_recorder', default=None)
+
+
+class QueryRecorder:
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.count = 0
+        self.duration = 0
+        self.duplicates = 0
+        self.statements = Counter()
+        self.offenders = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.statements[sql] += 1
+            repeats = self.statements[sql]
+            if repeats > 1:
+                self.duplicates += 1
+            if self.threshold and repeats == self.threshold:
+                self.offenders.append((sql, get_field_path()))
+
+
+def record_query(execute, sql, params, many, context):
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        recorder = QueryRecorder(settings.N_PLUS_ONE_THRESHOLD)
+        started = time.perf_counter()
+        token = current_recorder.set(recorder)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        if response.streaming:
+            response.streaming_content = self.consume(
+                response.streaming_content, request, response, recorder,
+                started)
+        else:
+            self.finish(request, response, recorder, started)
+        return response
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder(settings.N_PLUS_ONE_THRESHOLD)
+        started = time.perf_counter()
+        token = current_recorder.set(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        self.finish(request, response, recorder, started)
+        return response
+
+    def consume(self, content, request, response, recorder, started):
+        current_recorder.set(recorder)
+        try:
+            yield from content
+        finally:
+            current_recorder.set(None)
+        self.finish(request, response, recorder, started)
+
+    def finish(self, request, response, recorder, started):
+        duration = time.perf_counter() - started
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        registry.observe(
+            view, request.method, response.status_code, duration, recorder)
+        if not response.streaming:
+            response['Server-Timing'] = (
+                f'db;dur={recorder.duration * 1000:.1f};'
+                f'desc="{recorder.count} queries", '
+                f'total;dur={duration * 1000:.1f}')
+        for sql, field_path in recorder.offenders:
+            logger.warning(
+                'N+1 в %s %s: запрос повторён %s+ раз из %s: %s',
+                request.method, request.path, recorder.threshold,
+                field_path or 'неизвестного места', sql)
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.11 on 2026-10-18 18:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_recipe_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-date_of_creation', '-id'], name='recipe_feed_cursor_idx'),
+        ),
+    ]
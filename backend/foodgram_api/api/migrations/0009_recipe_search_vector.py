@@ -0,0 +1,46 @@
+# Generated by Django 3.2.11 on 2026-10-18 19:20
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+CREATE_SEARCH_INDEX = (
+    "UPDATE api_recipe SET search_vector = "
+    "setweight(to_tsvector('russian', name), 'A') || "
+    "setweight(to_tsvector('russian', text), 'B')",
+    'CREATE INDEX IF NOT EXISTS recipe_search_vector_idx '
+    'ON api_recipe USING gin (search_vector)',
+)
+
+DROP_SEARCH_INDEX = (
+    'DROP INDEX IF EXISTS recipe_search_vector_idx',
+)
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for statement in CREATE_SEARCH_INDEX:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for statement in DROP_SEARCH_INDEX:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_recipe_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 3.2.11 on 2026-10-18 19:48
+
+from django.db import migrations, models
+from django.db.models import Sum
+import django.db.models.deletion
+
+
+def fill_shopping_lists(apps, schema_editor):
+    ShoppingListItem = apps.get_model('api', 'ShoppingListItem')
+    ShoppingListItem.objects.bulk_create(
+        (
+            ShoppingListItem(
+                user_id=row['recipe__shoppingcart__user'],
+                ingredient_id=row['ingredient'],
+                amount=row['total'],
+            )
+            for row in apps.get_model('api', 'RecipeIngredient').objects.filter(
+                recipe__shoppingcart__isnull=False
+            ).values(
+                'recipe__shoppingcart__user', 'ingredient'
+            ).annotate(total=Sum('amount')).order_by().iterator()
+        ),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+        ('api', '0010_recipe_neighbours'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShoppingListItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.PositiveIntegerField(verbose_name='Количество')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api.ingredient', verbose_name='Ингредиент')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_list', to='users.user', verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Продукт из списка покупок',
+                'verbose_name_plural': 'Продукты из списка покупок',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='shoppinglistitem',
+            constraint=models.UniqueConstraint(fields=('user', 'ingredient'), name='unique_shopping_list_ingredient'),
+        ),
+        migrations.RunPython(fill_shopping_lists, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 3.2.11 on 2026-10-18 19:59
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_rows(model, owner_field, ingredient_ids, kept_id):
+    for row in model.objects.filter(ingredient__in=ingredient_ids):
+        kept, created = model.objects.get_or_create(
+            **{owner_field: getattr(row, owner_field)},
+            ingredient_id=kept_id,
+            defaults={'amount': row.amount},
+        )
+        if not created:
+            kept.amount += row.amount
+            kept.save(update_fields=('amount',))
+        row.delete()
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    Ingredient = apps.get_model('api', 'Ingredient')
+    duplicates = Ingredient.objects.values(
+        'name', 'measurement_unit'
+    ).annotate(kept_id=Min('pk'), total=Count('pk')).filter(total__gt=1)
+    for group in duplicates:
+        ingredient_ids = list(Ingredient.objects.filter(
+            name=group['name'], measurement_unit=group['measurement_unit']
+        ).exclude(pk=group['kept_id']).values_list('pk', flat=True))
+        merge_rows(apps.get_model('api', 'RecipeIngredient'), 'recipe_id',
+                   ingredient_ids, group['kept_id'])
+        merge_rows(apps.get_model('api', 'ShoppingListItem'), 'user_id',
+                   ingredient_ids, group['kept_id'])
+        Ingredient.objects.filter(pk__in=ingredient_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_shopping_list_items'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop),
+    ]
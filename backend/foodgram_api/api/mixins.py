@@ -1,8 +1,20 @@
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
 from rest_framework import status
 from rest_framework.response import Response
 
+from .cache import bump_versions, get_versions
+from .counters import recipe_counters_changed
 from .models import Recipe
+from .serializers import RecipeIdsSerializer
 
 
 class AddAndDeleteMixin:
@@ -16,18 +28,166 @@ class AddAndDeleteMixin:
         recipe = get_object_or_404(
             Recipe, id=kwargs['recipe_id']
         )
-        serializer.save(
-            user=user,
-            recipe=recipe
-        )
+        with transaction.atomic():
+            serializer.save(
+                user=user,
+                recipe=recipe
+            )
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def delete(self, request, recipe_id):
         user = request.user
         recipe = get_object_or_404(Recipe, id=recipe_id)
-        get_object_or_404(
-            self.model_class,
-            user=user,
-            recipe=recipe
-        ).delete()
+        with transaction.atomic():
+            get_object_or_404(
+                self.model_class,
+                user=user,
+                recipe=recipe
+            ).delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def get_recipe_ids(self, request):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data['recipes']
+
+    def recipes_changed(self, user, recipe_ids):
+        bump_versions(('recipes', f'user:{user.pk}'))
+
+    def add_many(self, request):
+        recipe_ids = self.get_recipe_ids(request)
+        user = request.user
+        results = dict.fromkeys(recipe_ids, status.HTTP_404_NOT_FOUND)
+        found = Recipe.objects.filter(pk__in=recipe_ids).annotate(
+            added=Exists(self.model_class.objects.filter(
+                user=user, recipe=OuterRef('pk')))
+        ).values_list('pk', 'added')
+        for recipe_id, added in found:
+            results[recipe_id] = (
+                status.HTTP_400_BAD_REQUEST if added
+                else status.HTTP_201_CREATED)
+        created = [
+            recipe_id for recipe_id, code in results.items()
+            if code == status.HTTP_201_CREATED
+        ]
+        if created:
+            with transaction.atomic():
+                self.model_class.objects.bulk_create(
+                    (self.model_class(user=user, recipe_id=recipe_id)
+                     for recipe_id in created),
+                    ignore_conflicts=True)
+                recipe_counters_changed(created)
+                self.recipes_changed(user, created)
+        return self.get_bulk_response(results)
+
+    def delete_many(self, request):
+        recipe_ids = self.get_recipe_ids(request)
+        user = request.user
+        results = dict.fromkeys(recipe_ids, status.HTTP_404_NOT_FOUND)
+        rows = self.model_class.objects.filter(
+            user=user, recipe__in=recipe_ids)
+        with transaction.atomic():
+            deleted = list(rows.values_list('recipe', flat=True))
+            if deleted:
+                rows.delete()
+                self.recipes_changed(user, deleted)
+        for recipe_id in deleted:
+            results[recipe_id] = status.HTTP_204_NO_CONTENT
+        return self.get_bulk_response(results)
+
+    def get_bulk_response(self, results):
+        return Response([
+            {'id': recipe_id, 'status': code}
+            for recipe_id, code in results.items()
+        ])
+
+
+class CachedCatalogMixin:
+    catalog = None
+
+    def get_catalog_items(self):
+        return self.catalog.get(
+            'items',
+            lambda: {
+                item['id']: dict(item)
+                for item in self.get_serializer(
+                    self.get_queryset(), many=True).data
+            },
+            shared=settings.CATALOG_CACHE_SHARED,
+        )
+
+    def get_conditional_response(self, request, build_response):
+        etag = self.catalog.get_etag()
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = build_response()
+        response['ETag'] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params:
+            return self.get_conditional_response(
+                request, lambda: super(CachedCatalogMixin, self).list(
+                    request, *args, **kwargs))
+        return self.get_conditional_response(
+            request,
+            lambda: Response(list(self.get_catalog_items().values())))
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            pk = int(kwargs[self.lookup_url_kwarg or self.lookup_field])
+            item = self.get_catalog_items()[pk]
+        except (KeyError, ValueError):
+            raise Http404
+        return self.get_conditional_response(
+            request, lambda: Response(item))
+
+
+class CachedResponseMixin:
+
+    def get_response_cache_key(self, request, names):
+        user = request.user
+        variant = 'anonymous' if user.is_anonymous else f'user:{user.pk}'
+        if not user.is_anonymous:
+            names = (*names, variant)
+        versions = ':'.join(map(str, get_versions(names)))
+        return 'response:' + md5(
+            f'{variant}:{request.get_full_path()}:{versions}'.encode()
+        ).hexdigest()
+
+    def render_for_cache(self, request, build_response):
+        response, depends = build_response()
+        response.accepted_renderer = request.accepted_renderer
+        response.accepted_media_type = request.accepted_media_type
+        response.renderer_context = self.get_renderer_context()
+        response.render()
+        return {
+            'content': response.content,
+            'content_type': response['Content-Type'],
+            'etag': f'"{md5(response.content).hexdigest()}"',
+            'depends': depends,
+            'depends_versions': get_versions(depends),
+        }
+
+    def get_cached_response(self, request, names, build_response):
+        timeout = settings.RESPONSE_CACHE_TIMEOUT
+        if not timeout or request.accepted_renderer.format != 'json':
+            return build_response()[0]
+        key = self.get_response_cache_key(request, names)
+        cached = cache.get(key)
+        if cached is None or (
+                get_versions(cached['depends'])
+                != cached['depends_versions']):
+            cached = self.render_for_cache(request, build_response)
+            cache.set(key, cached, timeout)
+        response = get_conditional_response(request, etag=cached['etag'])
+        if response is None:
+            response = HttpResponse(
+                cached['content'], content_type=cached['content_type'])
+        response['ETag'] = cached['etag']
+        if request.user.is_anonymous:
+            patch_cache_control(response, no_cache=True, public=True)
+        else:
+            patch_cache_control(response, no_cache=True, private=True)
+        patch_vary_headers(response, ('Authorization',))
+        return response
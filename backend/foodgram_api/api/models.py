@@ -1,8 +1,15 @@
 from colorfield.fields import ColorField
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models import (BooleanField, Case, Count, Exists, FloatField,
+                              OuterRef, Prefetch, Subquery, Sum, Value, When)
+from django.db.models.functions import Coalesce
 
-from users.models import User
+from users.models import Follow, User
+
+FOLLOWED_AUTHOR_BOOST = 0.5
+RECOMMENDATION_LIMIT = 500
 
 
 class Ingredient(models.Model):
@@ -12,6 +19,10 @@ class Ingredient(models.Model):
     class Meta:
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
+        constraints = (models.UniqueConstraint(
+            fields=('name', 'measurement_unit'),
+            name='unique_ingredient'),
+        )
 
     def __str__(self):
         return self.name
@@ -30,6 +41,64 @@ class Tag(models.Model):
         return self.name
 
 
+def count_recipe_rows(model):
+    return Coalesce(Subquery(
+        model.objects.filter(
+            recipe=OuterRef('pk')
+        ).order_by().values('recipe').annotate(
+            total=Count('pk')
+        ).values('total')
+    ), 0)
+
+
+class RecipeQuerySet(models.QuerySet):
+
+    def with_user_flags(self, user):
+        if user.is_anonymous:
+            return self.annotate(
+                is_favorited=Value(False, output_field=BooleanField()),
+                is_in_shopping_cart=Value(False, output_field=BooleanField()),
+            )
+        return self.annotate(
+            is_favorited=Exists(FavoriteRecipe.objects.filter(
+                user=user, recipe=OuterRef('pk'))),
+            is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                user=user, recipe=OuterRef('pk'))),
+        )
+
+    def recount_counters(self):
+        return self.update(
+            favorites_count=count_recipe_rows(FavoriteRecipe),
+            in_carts_count=count_recipe_rows(ShoppingCart),
+        )
+
+    def popular(self):
+        return self.order_by(
+            '-favorites_count', '-in_carts_count', '-date_of_creation')
+
+    def for_read(self, user, fields=None):
+        queryset = self.with_user_flags(user).defer('search_vector')
+        if fields is None:
+            fields = ('author', 'tags', 'ingredients', 'text')
+        if 'text' not in fields:
+            queryset = queryset.defer('text')
+        if 'author' in fields:
+            authors = User.objects.all()
+            if not user.is_anonymous:
+                authors = authors.annotate(is_subscribe=Exists(
+                    Follow.objects.filter(user=user, author=OuterRef('pk'))))
+            queryset = queryset.prefetch_related(
+                Prefetch('author', queryset=authors))
+        if 'tags' in fields:
+            queryset = queryset.prefetch_related('tags')
+        if 'ingredients' in fields:
+            queryset = queryset.prefetch_related(Prefetch(
+                'ingredients_from_recipe',
+                queryset=RecipeIngredient.objects.select_related(
+                    'ingredient')))
+        return queryset
+
+
 class Recipe(models.Model):
     author = models.ForeignKey(
         User, verbose_name='Автор', related_name='recipes',
@@ -41,6 +110,9 @@ class Recipe(models.Model):
         validators=[MinValueValidator(
             1, 'Время приготовления не может быть меньше 1')])
     image = models.ImageField('Картинка')
+    image_variants = models.JSONField(
+        'Уменьшенные копии картинки', default=dict, blank=True,
+        editable=False)
     tags = models.ManyToManyField(
         Tag, verbose_name='Тэги')
     ingredients = models.ManyToManyField(
@@ -49,11 +121,31 @@ class Recipe(models.Model):
         verbose_name='Необходимые ингредиенты')
     date_of_creation = models.DateTimeField(
         'Дата и время создания', auto_now_add=True)
+    favorites_count = models.PositiveIntegerField(
+        'Добавлений в избранное', default=0, editable=False)
+    in_carts_count = models.PositiveIntegerField(
+        'Добавлений в список покупок', default=0, editable=False)
+    search_vector = SearchVectorField(
+        'Поисковый вектор', null=True, editable=False)
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-date_of_creation',)
+        indexes = (
+            models.Index(
+                fields=('-favorites_count', '-in_carts_count',
+                        '-date_of_creation'),
+                name='recipe_popularity_idx'),
+            models.Index(
+                fields=('-date_of_creation', '-id'),
+                name='recipe_feed_cursor_idx'),
+            models.Index(
+                fields=('author', '-date_of_creation'),
+                name='recipe_author_feed_idx'),
+        )
 
     def __str__(self):
         return self.name
@@ -122,3 +214,66 @@ class ShoppingCart(models.Model):
             fields=('user', 'recipe'),
             name='unique_recipe_in_shopping_cart'),
         )
+
+
+class ShoppingListItem(models.Model):
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, verbose_name='Пользователь',
+        related_name='shopping_list'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient, on_delete=models.CASCADE, verbose_name='Ингредиент')
+    amount = models.PositiveIntegerField('Количество')
+
+    class Meta:
+        verbose_name = 'Продукт из списка покупок'
+        verbose_name_plural = 'Продукты из списка покупок'
+        constraints = (models.UniqueConstraint(
+            fields=('user', 'ingredient'),
+            name='unique_shopping_list_ingredient'),
+        )
+
+
+class RecipeNeighbourQuerySet(models.QuerySet):
+
+    def recommended_for(self, user, limit=RECOMMENDATION_LIMIT):
+        interacted = list(FavoriteRecipe.objects.filter(
+            user=user).values_list('recipe', flat=True).union(
+            ShoppingCart.objects.filter(
+                user=user).values_list('recipe', flat=True)))
+        if not interacted:
+            return []
+        followed = Exists(Follow.objects.filter(
+            user=user, author=OuterRef('neighbour__author')))
+        return list(self.filter(recipe__in=interacted).exclude(
+            neighbour__in=interacted,
+        ).values('neighbour').annotate(
+            recommendation_score=Sum('score') + Case(
+                When(followed, then=Value(FOLLOWED_AUTHOR_BOOST)),
+                default=Value(0.0),
+                output_field=FloatField(),
+            ),
+        ).order_by('-recommendation_score', '-neighbour_id').values_list(
+            'neighbour', 'recommendation_score')[:limit])
+
+
+class RecipeNeighbour(models.Model):
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE, verbose_name='Рецепт',
+        related_name='neighbours'
+    )
+    neighbour = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE, verbose_name='Похожий рецепт',
+        related_name='neighbour_of'
+    )
+    score = models.FloatField('Сходство')
+
+    objects = RecipeNeighbourQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+        constraints = (models.UniqueConstraint(
+            fields=('recipe', 'neighbour'),
+            name='unique_recipe_neighbour'),
+        )
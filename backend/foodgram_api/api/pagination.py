@@ -1,8 +1,91 @@
-from rest_framework.pagination import PageNumberPagination
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 PAGE_SIZE = 6
 
 
+class CachedCountPaginator(Paginator):
+
+    @cached_property
+    def count(self):
+        timeout = settings.PAGINATION_COUNT_CACHE_TIMEOUT
+        query = getattr(self.object_list, 'query', None)
+        if not timeout or query is None:
+            return super().count
+        try:
+            sql = str(query)
+        except EmptyResultSet:
+            return 0
+        key = 'pagination:count:' + md5(sql.encode()).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, timeout)
+        return count
+
+
+class RecipeCursorPagination(CursorPagination):
+    page_size = PAGE_SIZE
+    page_size_query_param = 'limit'
+    ordering = ('-date_of_creation', '-id')
+    unsupported_params = ('ordering', 'search')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = [
+            param for param in self.unsupported_params
+            if request.query_params.get(param)
+        ]
+        if params:
+            raise ValidationError({
+                param: 'Не поддерживается с курсорной пагинацией.'
+                for param in params
+            })
+        return super().paginate_queryset(queryset, request, view)
+
+
+class SubscriptionCursorPagination(CursorPagination):
+    page_size = PAGE_SIZE
+    page_size_query_param = 'limit'
+    ordering = ('id',)
+
+
 class CustomPageNumberPagination(PageNumberPagination):
     page_size = PAGE_SIZE
     page_size_query_param = 'limit'
+    django_paginator_class = CachedCountPaginator
+    cursor_pagination_class = None
+    cursor_paginator = None
+
+    def use_cursor(self, request):
+        return self.cursor_pagination_class is not None and (
+            self.cursor_pagination_class.cursor_query_param
+            in request.query_params
+            or request.query_params.get('pagination') == 'cursor'
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class RecipePagination(CustomPageNumberPagination):
+    cursor_pagination_class = RecipeCursorPagination
+
+
+class SubscriptionPagination(CustomPageNumberPagination):
+    cursor_pagination_class = SubscriptionCursorPagination
@@ -0,0 +1,73 @@
+from itertools import islice
+
+import numpy as np
+from django.db import transaction
+from scipy import sparse
+
+from .models import FavoriteRecipe, RecipeNeighbour, ShoppingCart
+
+FAVORITE_WEIGHT = 1.0
+CART_WEIGHT = 0.5
+NEIGHBOURS = 20
+BATCH_SIZE = 5000
+
+
+def load_interactions(cart_weight=CART_WEIGHT):
+    pairs, weights = [], []
+    for model, weight in ((FavoriteRecipe, FAVORITE_WEIGHT),
+                          (ShoppingCart, cart_weight)):
+        rows = np.fromiter(
+            (value for row in model.objects.values_list(
+                'user_id', 'recipe_id').iterator() for value in row),
+            dtype=np.int64).reshape(-1, 2)
+        pairs.append(rows)
+        weights.append(np.full(len(rows), weight))
+    pairs = np.concatenate(pairs)
+    recipe_ids, recipe_index = np.unique(pairs[:, 1], return_inverse=True)
+    _, user_index = np.unique(pairs[:, 0], return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.concatenate(weights), (user_index, recipe_index)),
+        shape=(user_index.max(initial=-1) + 1, len(recipe_ids)))
+    return matrix, recipe_ids
+
+
+def get_item_similarity(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0))).ravel()
+    norms[norms == 0] = 1
+    normalized = matrix @ sparse.diags(1 / norms)
+    similarity = (normalized.T @ normalized).tocsr()
+    similarity.setdiag(0)
+    similarity.eliminate_zeros()
+    return similarity
+
+
+def iter_top_neighbours(similarity, recipe_ids, neighbours=NEIGHBOURS):
+    for row in range(similarity.shape[0]):
+        start, end = similarity.indptr[row], similarity.indptr[row + 1]
+        scores = similarity.data[start:end]
+        columns = similarity.indices[start:end]
+        if len(scores) > neighbours:
+            top = np.argpartition(-scores, neighbours)[:neighbours]
+            scores, columns = scores[top], columns[top]
+        recipe_id = int(recipe_ids[row])
+        for neighbour_id, score in zip(
+                recipe_ids[columns].tolist(), scores.tolist()):
+            yield RecipeNeighbour(
+                recipe_id=recipe_id, neighbour_id=neighbour_id, score=score)
+
+
+@transaction.atomic
+def build_recipe_neighbours(neighbours=NEIGHBOURS, cart_weight=CART_WEIGHT):
+    matrix, recipe_ids = load_interactions(cart_weight)
+    RecipeNeighbour.objects.all().delete()
+    if not len(recipe_ids):
+        return 0
+    objects = iter_top_neighbours(
+        get_item_similarity(matrix), recipe_ids, neighbours)
+    created = 0
+    while True:
+        batch = list(islice(objects, BATCH_SIZE))
+        if not batch:
+            return created
+        RecipeNeighbour.objects.bulk_create(batch)
+        created += len(batch)
@@ -0,0 +1,158 @@
+import heapq
+import re
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector, TrigramSimilarity)
+from django.db import connections
+from django.db.models import BooleanField, Case, F, Q, Value, When
+
+from .cache import ingredient_catalog, recipe_search_catalog
+from .models import Ingredient, Recipe
+
+INGREDIENT_SEARCH_LIMIT = 50
+RECIPE_SEARCH_LIMIT = 1000
+RECIPE_SEARCH_CONFIG = 'russian'
+NAME_WEIGHT = 1.0
+TEXT_WEIGHT = 0.4
+WORD = re.compile(r'\w+')
+
+
+class IngredientPrefixIndex:
+
+    def __init__(self, rows):
+        rows = sorted((name.casefold(), pk) for pk, name in rows)
+        self.names = [name for name, _ in rows]
+        self.ids = [pk for _, pk in rows]
+
+    @classmethod
+    def build(cls):
+        return cls(Ingredient.objects.values_list('id', 'name'))
+
+    def search(self, value, limit=INGREDIENT_SEARCH_LIMIT):
+        names, ids = self.names, self.ids
+        prefix = value.casefold()
+        found = []
+        position = bisect_left(names, prefix)
+        while (
+            position < len(names)
+            and names[position].startswith(prefix)
+            and len(found) < limit
+        ):
+            found.append(ids[position])
+            position += 1
+        if len(found) < limit:
+            for name, pk in zip(names, ids):
+                if prefix in name and not name.startswith(prefix):
+                    found.append(pk)
+                    if len(found) == limit:
+                        break
+        return found
+
+
+def get_ingredient_prefix_index():
+    return ingredient_catalog.get('prefix_index', IngredientPrefixIndex.build)
+
+
+def order_by_ids(queryset, ids):
+    if not ids:
+        return queryset.none()
+    return queryset.filter(pk__in=ids).order_by(
+        Case(*(When(pk=pk, then=Value(position))
+               for position, pk in enumerate(ids)))
+    )
+
+
+def search_ingredients(queryset, value, limit=INGREDIENT_SEARCH_LIMIT):
+    if connections[queryset.db].vendor == 'postgresql':
+        return queryset.annotate(
+            is_prefix=Case(
+                When(name__istartswith=value, then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            ),
+            similarity=TrigramSimilarity('name', value),
+        ).filter(
+            Q(name__istartswith=value) | Q(name__trigram_similar=value)
+        ).order_by('-is_prefix', '-similarity', 'name')[:limit]
+    return order_by_ids(
+        queryset, get_ingredient_prefix_index().search(value, limit))
+
+
+def tokenize(text):
+    return WORD.findall(text.casefold())
+
+
+class RecipeSearchIndex:
+
+    def __init__(self, rows):
+        postings = defaultdict(dict)
+        for pk, name, text in rows:
+            for weight, field in ((TEXT_WEIGHT, text), (NAME_WEIGHT, name)):
+                for token in set(tokenize(field)):
+                    postings[token][pk] = weight
+        self.tokens = sorted(postings)
+        self.postings = [postings[token] for token in self.tokens]
+
+    @classmethod
+    def build(cls):
+        return cls(Recipe.objects.values_list('id', 'name', 'text'))
+
+    def match(self, term):
+        matches = {}
+        position = bisect_left(self.tokens, term)
+        while (
+            position < len(self.tokens)
+            and self.tokens[position].startswith(term)
+        ):
+            for pk, weight in self.postings[position].items():
+                if weight > matches.get(pk, 0):
+                    matches[pk] = weight
+            position += 1
+        return matches
+
+    def search(self, value, limit=RECIPE_SEARCH_LIMIT):
+        scores = None
+        for term in set(tokenize(value)):
+            matches = self.match(term)
+            if scores is None:
+                scores = matches
+            else:
+                scores = {
+                    pk: scores[pk] + weight
+                    for pk, weight in matches.items() if pk in scores
+                }
+            if not scores:
+                return []
+        if not scores:
+            return []
+        return heapq.nlargest(
+            limit, scores, key=lambda pk: (scores[pk], pk))
+
+
+def get_recipe_search_index():
+    return recipe_search_catalog.get('index', RecipeSearchIndex.build)
+
+
+def get_recipe_search_vector():
+    return (
+        SearchVector('name', weight='A', config=RECIPE_SEARCH_CONFIG)
+        + SearchVector('text', weight='B', config=RECIPE_SEARCH_CONFIG)
+    )
+
+
+def reindex_recipes(queryset):
+    if connections[queryset.db].vendor == 'postgresql':
+        queryset.update(search_vector=get_recipe_search_vector())
+    recipe_search_catalog.bump()
+
+
+def search_recipes(queryset, value):
+    if connections[queryset.db].vendor == 'postgresql':
+        query = SearchQuery(
+            value, config=RECIPE_SEARCH_CONFIG, search_type='websearch')
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query),
+        ).order_by('-search_rank', '-date_of_creation')
+    return order_by_ids(queryset, get_recipe_search_index().search(value))
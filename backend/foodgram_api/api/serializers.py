@@ -1,11 +1,27 @@
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 
 from users.models import Follow, User
 from users.serializers import UserSerializer
+from .images import get_image_url, schedule_image_variants
 from .models import (FavoriteRecipe, Ingredient, Recipe, RecipeIngredient,
-                     ShoppingCart, Tag)
+                     ShoppingCart, ShoppingListItem, Tag)
+from .shopping_list import recipe_ingredients_changed
+
+
+class RecipeImageField(serializers.Field):
+
+    def __init__(self, variant=None, **kwargs):
+        self.variant = variant
+        kwargs.setdefault('source', '*')
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, recipe):
+        variant = self.variant or self.context.get('image_variant', 'full')
+        return get_image_url(recipe, variant, self.context.get('request'))
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -23,11 +39,10 @@ class IngredientSerializer(serializers.ModelSerializer):
 
 
 class FavoriteRecipesSerializer(serializers.ModelSerializer):
-    id = serializers.IntegerField()
+    id = serializers.IntegerField(read_only=True, source='recipe.id')
     name = serializers.CharField(
         read_only=True, source='recipe.name')
-    image = serializers.ImageField(
-        use_url=True, read_only=True, source='recipe.image')
+    image = RecipeImageField(variant='thumbnail', source='recipe')
     cooking_time = serializers.CharField(
         read_only=True, source='recipe.cooking_time')
 
@@ -36,19 +51,20 @@ class FavoriteRecipesSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'image', 'cooking_time')
 
     def validate(self, data):
-        recipe = get_object_or_404(Recipe, id=data['id'])
-        if FavoriteRecipe.objects.filter(recipe=recipe).exists():
+        if FavoriteRecipe.objects.filter(
+            user=self.context['request'].user,
+            recipe_id=self.context['view'].kwargs['recipe_id']
+        ).exists():
             raise serializers.ValidationError(
                 'Рецепт уже добавлен в избранное')
         return super().validate(data)
 
 
 class ShoppingCartSerializer(serializers.ModelSerializer):
-    id = serializers.IntegerField()
+    id = serializers.IntegerField(read_only=True, source='recipe.id')
     name = serializers.CharField(
         read_only=True, source='recipe.name')
-    image = serializers.ImageField(
-        read_only=True, source='recipe.image')
+    image = RecipeImageField(variant='thumbnail', source='recipe')
     cooking_time = serializers.CharField(
         read_only=True, source='recipe.cooking_time')
 
@@ -57,8 +73,10 @@ class ShoppingCartSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'image', 'cooking_time')
 
     def validate(self, data):
-        recipe = get_object_or_404(Recipe, id=data['id'])
-        if ShoppingCart.objects.filter(recipe=recipe).exists():
+        if ShoppingCart.objects.filter(
+            user=self.context['request'].user,
+            recipe_id=self.context['view'].kwargs['recipe_id']
+        ).exists():
             raise serializers.ValidationError(
                 'Рецепт уже добавлен в список покупок')
         return super().validate(data)
@@ -85,9 +103,21 @@ class RecipeIngredientsSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
+class ShoppingListItemSerializer(RecipeIngredientsSerializer):
+
+    class Meta(RecipeIngredientsSerializer.Meta):
+        model = ShoppingListItem
+
+
+RECIPE_CARD_FIELDS = (
+    'id', 'tags', 'is_favorited', 'is_in_shopping_cart',
+    'name', 'image', 'cooking_time',
+)
+
+
 class RecipeReadSerializer(serializers.ModelSerializer):
     id = serializers.IntegerField(required=False)
-    image = Base64ImageField()
+    image = RecipeImageField()
     author = UserSerializer(
         required=False, read_only=True)
     ingredients = RecipeIngredientsSerializer(
@@ -111,22 +141,65 @@ class RecipeReadSerializer(serializers.ModelSerializer):
             'name', 'image', 'text', 'cooking_time'
         )
 
+    def get_fields(self):
+        fields = super().get_fields()
+        selected = self.context.get('fields')
+        if selected is None:
+            return fields
+        return {
+            name: field for name, field in fields.items() if name in selected
+        }
+
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         user = self.context['request'].user
         if user.is_anonymous:
             return False
         return FavoriteRecipe.objects.filter(user=user, recipe=obj).exists()
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         user = self.context['request'].user
         if user.is_anonymous:
             return False
         return ShoppingCart.objects.filter(user=user, recipe=obj).exists()
 
 
+class RecipeMatchSerializer(RecipeReadSerializer):
+    coverage = serializers.SerializerMethodField()
+    missing_ingredients = serializers.SerializerMethodField()
+
+    class Meta(RecipeReadSerializer.Meta):
+        fields = RecipeReadSerializer.Meta.fields + (
+            'coverage', 'missing_ingredients')
+
+    def get_coverage(self, obj):
+        return round(self.context['coverage'][obj.id], 3)
+
+    def get_missing_ingredients(self, obj):
+        pantry = self.context['pantry']
+        return IngredientSerializer(
+            [item.ingredient for item in obj.ingredients_from_recipe.all()
+             if item.ingredient_id not in pantry],
+            many=True).data
+
+
+class PantrySerializer(serializers.Serializer):
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False, max_length=100)
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False, max_length=100)
+
+
 class AddIngredient(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all())
+    id = serializers.IntegerField()
     amount = serializers.IntegerField()
 
     class Meta:
@@ -158,30 +231,63 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
             if user != recipe.author:
                 raise serializers.ValidationError(
                     'Нельзя редактировать чужой рецепт')
-        ingredients = data.get('ingredients')
-        for ingredient in ingredients:
+        ingredients = {}
+        for ingredient in data.get('ingredients'):
             if ingredient['amount'] < 1:
                 raise serializers.ValidationError(
                     'Количество ингредиента не может быть меньше 1')
+            ingredients[ingredient['id']] = (
+                ingredients.get(ingredient['id'], 0) + ingredient['amount'])
+        existing = set(Ingredient.objects.filter(
+            id__in=ingredients).values_list('id', flat=True))
+        if len(existing) != len(ingredients):
+            raise serializers.ValidationError(
+                'Ингредиенты не найдены: '
+                f'{", ".join(map(str, ingredients.keys() - existing))}')
         tags = data['tags']
         if not tags:
             raise serializers.ValidationError(
-                    'Выберите хотя бы один тэг')
+                'Выберите хотя бы один тэг')
         data.update({'ingredients': ingredients})
         data.update({'tags': tags})
         return super().validate(data)
 
-    def save_tags_and_ingredients(self, recipe, validated_data):
+    def save_tags_and_ingredients(self, recipe, validated_data,
+                                  created=False):
         tags = validated_data.pop('tags')
         recipe.tags.set(tags)
         ingredients = validated_data.pop('ingredients')
-        for ingredient in ingredients:
-            RecipeIngredient.objects.create(
-                recipe=recipe,
-                ingredient=ingredient['id'],
-                amount=ingredient['amount']
-            )
-
+        existing = {}
+        if not created:
+            existing = {
+                item.ingredient_id: item
+                for item in RecipeIngredient.objects.filter(recipe=recipe)
+            }
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe, ingredient_id=ingredient_id, amount=amount)
+            for ingredient_id, amount in ingredients.items()
+            if ingredient_id not in existing
+        )
+        changed = []
+        for ingredient_id, item in existing.items():
+            amount = ingredients.get(ingredient_id)
+            if amount is not None and amount != item.amount:
+                item.amount = amount
+                changed.append(item)
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ('amount',))
+        if not created:
+            recipe_ingredients_changed(
+                recipe.pk,
+                (ingredients.keys() - existing.keys())
+                | {item.ingredient_id for item in changed})
+        removed = existing.keys() - ingredients.keys()
+        if removed:
+            RecipeIngredient.objects.filter(
+                recipe=recipe, ingredient_id__in=removed).delete()
+
+    @transaction.atomic
     def create(self, validated_data):
         user = self.context['request'].user
         recipe = Recipe.objects.create(
@@ -191,22 +297,41 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
             cooking_time=validated_data['cooking_time'],
             image=validated_data['image'],
         )
-        self.save_tags_and_ingredients(recipe, validated_data)
+        self.save_tags_and_ingredients(recipe, validated_data, created=True)
+        schedule_image_variants(recipe)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        RecipeIngredient.objects.filter(recipe=instance).delete()
         self.save_tags_and_ingredients(instance, validated_data)
-        return super().update(instance, validated_data)
+        stale_variants = None
+        if 'image' in validated_data:
+            stale_variants = instance.image_variants
+            validated_data['image_variants'] = {}
+        recipe = super().update(instance, validated_data)
+        if 'image' in validated_data:
+            schedule_image_variants(recipe, stale_variants)
+        return recipe
 
     def to_representation(self, instance):
         request = self.context.get('request')
         context = {'request': request}
+        instance = Recipe.objects.for_read(request.user).get(pk=instance.pk)
         return RecipeReadSerializer(instance, context=context).data
 
 
+def get_recipes_limit(request):
+    value = request.query_params.get('recipes_limit', '').strip()
+    if not value:
+        return None
+    if not value.isdecimal():
+        raise serializers.ValidationError({
+            'recipes_limit': 'Укажите целое неотрицательное число.'})
+    return int(value)
+
+
 class SubscribeSerializer(serializers.ModelSerializer):
-    id = serializers.IntegerField()
+    id = serializers.IntegerField(read_only=True, source='author.id')
     email = serializers.EmailField(
         read_only=True, source='author.email')
     username = serializers.CharField(
@@ -231,7 +356,8 @@ class SubscribeSerializer(serializers.ModelSerializer):
 
     def validate(self, data):
         user = self.context['request'].user
-        author = get_object_or_404(User, id=data['id'])
+        author = get_object_or_404(
+            User, id=self.context['view'].kwargs['user_id'])
         if user == author:
             raise serializers.ValidationError(
                 'Нельзя подписаться на самого себя'
@@ -239,6 +365,7 @@ class SubscribeSerializer(serializers.ModelSerializer):
         if Follow.objects.filter(user=user, author=author).exists():
             raise serializers.ValidationError(
                 'Вы уже подписаны на этого пользователя')
+        get_recipes_limit(self.context['request'])
         return super().validate(data)
 
     def get_is_subscribe(self, obj):
@@ -249,21 +376,26 @@ class SubscribeSerializer(serializers.ModelSerializer):
 
     def get_recipes(self, obj):
         request = self.context.get('request')
-        recipes_limit = request.GET.get('recipes_limit')
-        queryset = obj.author.recipes.all()
-        if recipes_limit:
-            queryset = queryset[:int(recipes_limit)]
+        if hasattr(obj.author, 'subscription_recipes'):
+            queryset = obj.author.subscription_recipes
+        else:
+            recipes_limit = get_recipes_limit(request)
+            queryset = obj.author.recipes.all()
+            if recipes_limit is not None:
+                queryset = queryset[:recipes_limit]
         return RecipeForSubscriptionSerializer(
             queryset, many=True, context={'request': request}).data
 
     def get_recipes_count(self, obj):
+        if hasattr(obj, 'recipes_count'):
+            return obj.recipes_count
         return obj.author.recipes.count()
 
 
 class RecipeForSubscriptionSerializer(serializers.ModelSerializer):
     id = serializers.IntegerField(read_only=True)
     name = serializers.CharField(read_only=True)
-    image = Base64ImageField(use_url=True, read_only=True)
+    image = RecipeImageField(variant='thumbnail')
     cooking_time = serializers.CharField(read_only=True)
 
     class Meta:
@@ -0,0 +1,93 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Sum
+
+from users.models import User
+from .db import PendingChanges
+from .models import RecipeIngredient, ShoppingCart, ShoppingListItem
+
+
+def get_shopping_list(user):
+    return ShoppingListItem.objects.filter(user=user).select_related(
+        'ingredient').order_by(
+        'ingredient__name', 'ingredient__measurement_unit')
+
+
+@transaction.atomic
+def refresh_shopping_lists(user_ids, ingredient_ids=None):
+    user_ids = list(User.objects.select_for_update().filter(
+        pk__in=user_ids).order_by('pk').values_list('pk', flat=True))
+    items = ShoppingListItem.objects.filter(user__in=user_ids)
+    totals = RecipeIngredient.objects.filter(
+        recipe__shoppingcart__user__in=user_ids)
+    if ingredient_ids is not None:
+        items = items.filter(ingredient__in=ingredient_ids)
+        totals = totals.filter(ingredient__in=ingredient_ids)
+    items.delete()
+    ShoppingListItem.objects.bulk_create(
+        ShoppingListItem(
+            user_id=row['recipe__shoppingcart__user'],
+            ingredient_id=row['ingredient'],
+            amount=row['total'],
+        )
+        for row in totals.values(
+            'recipe__shoppingcart__user', 'ingredient'
+        ).annotate(total=Sum('amount')).order_by().iterator()
+    )
+
+
+class ShoppingListChanges(PendingChanges):
+    connection_attribute = 'shopping_list_changes'
+
+    def __init__(self, hooks=None):
+        super().__init__(hooks)
+        self.carts = set()
+        self.recipes = defaultdict(set)
+
+    def get_recipe_ingredients(self, recipe_ids):
+        ingredients = defaultdict(set)
+        for recipe_id, ingredient_ids in self.recipes.items():
+            ingredients[recipe_id].update(ingredient_ids)
+        for recipe_id, ingredient_id in RecipeIngredient.objects.filter(
+                recipe__in=recipe_ids).values_list('recipe', 'ingredient'):
+            ingredients[recipe_id].add(ingredient_id)
+        return ingredients
+
+    def __call__(self):
+        ingredients = self.get_recipe_ingredients(
+            {recipe_id for _, recipe_id in self.carts})
+        changed = defaultdict(set)
+        for recipe_id, user_id in ShoppingCart.objects.filter(
+                recipe__in=self.recipes).values_list('recipe', 'user'):
+            changed[user_id].update(self.recipes[recipe_id])
+        removed_recipes = set()
+        for user_id, recipe_id in self.carts:
+            if recipe_id in ingredients:
+                changed[user_id].update(ingredients[recipe_id])
+            else:
+                removed_recipes.add(user_id)
+        if removed_recipes:
+            refresh_shopping_lists(removed_recipes)
+        changed = {
+            user_id: ingredient_ids
+            for user_id, ingredient_ids in changed.items()
+            if user_id not in removed_recipes and ingredient_ids
+        }
+        if changed:
+            refresh_shopping_lists(
+                changed, set().union(*changed.values()))
+
+
+def cart_changed(user_id, recipe_id):
+    changes = ShoppingListChanges.current()
+    changes.carts.add((user_id, recipe_id))
+    changes.schedule()
+
+
+def recipe_ingredients_changed(recipe_id, ingredient_ids):
+    ingredient_ids = set(ingredient_ids)
+    if ingredient_ids:
+        changes = ShoppingListChanges.current()
+        changes.recipes[recipe_id].update(ingredient_ids)
+        changes.schedule()
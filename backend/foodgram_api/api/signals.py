@@ -0,0 +1,133 @@
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from users.models import Follow, User
+from .cache import (bump_versions, ingredient_catalog, recipe_catalog,
+                    recipe_search_catalog, tag_catalog)
+from .counters import recipe_counters_changed
+from .db import check_connections
+from .matching import recipe_ingredient_index
+from .middleware import record_query
+from .models import (FavoriteRecipe, Ingredient, Recipe, RecipeIngredient,
+                     ShoppingCart, Tag)
+from .search import reindex_recipes
+from .shopping_list import cart_changed, recipe_ingredients_changed
+
+RECIPE_SEARCH_FIELDS = {'name', 'text'}
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def bump_tag_catalog(sender, **kwargs):
+    tag_catalog.bump()
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def bump_ingredient_catalog(sender, **kwargs):
+    ingredient_catalog.bump()
+
+
+def get_recipe_search_fields(instance):
+    deferred = instance.get_deferred_fields()
+    return {
+        field: getattr(instance, field)
+        for field in RECIPE_SEARCH_FIELDS if field not in deferred
+    }
+
+
+@receiver(post_init, sender=Recipe)
+def remember_recipe_search_fields(sender, instance, **kwargs):
+    instance.loaded_search_fields = get_recipe_search_fields(instance)
+
+
+@receiver(post_save, sender=Recipe)
+def update_recipe_search(sender, instance, created, update_fields=None,
+                         **kwargs):
+    fields = get_recipe_search_fields(instance)
+    if not created:
+        if update_fields:
+            fields = {
+                field: value for field, value in fields.items()
+                if field in update_fields
+            }
+        loaded = instance.loaded_search_fields
+        if all(field in loaded and loaded[field] == value
+               for field, value in fields.items()):
+            return
+    reindex_recipes(Recipe.objects.filter(pk=instance.pk))
+    instance.loaded_search_fields.update(fields)
+
+
+@receiver(post_delete, sender=Recipe)
+def bump_recipe_search(sender, **kwargs):
+    recipe_search_catalog.bump()
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def update_recipe_ingredient_index(sender, instance, update_fields=None,
+                                   **kwargs):
+    if not update_fields:
+        recipe_ingredient_index.changed([instance.pk])
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_to_shopping_list(sender, instance, created, **kwargs):
+    if created:
+        cart_changed(instance.user_id, instance.recipe_id)
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def remove_from_shopping_list(sender, instance, **kwargs):
+    cart_changed(instance.user_id, instance.recipe_id)
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def update_shopping_lists(sender, instance, **kwargs):
+    recipe_ingredients_changed(instance.recipe_id, [instance.ingredient_id])
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def bump_recipe_responses(sender, instance, **kwargs):
+    bump_versions((recipe_catalog.name, f'recipe:{instance.pk}'))
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def bump_recipe_ingredient_responses(sender, instance, **kwargs):
+    bump_versions((recipe_catalog.name, f'recipe:{instance.recipe_id}'))
+
+
+@receiver((post_save, post_delete), sender=FavoriteRecipe)
+@receiver((post_save, post_delete), sender=ShoppingCart)
+def recount_recipe_counters(sender, instance, created=True, **kwargs):
+    if created:
+        recipe_counters_changed((instance.recipe_id,))
+
+
+@receiver((post_save, post_delete), sender=FavoriteRecipe)
+@receiver((post_save, post_delete), sender=ShoppingCart)
+def bump_user_recipe_responses(sender, instance, **kwargs):
+    bump_versions((recipe_catalog.name, f'user:{instance.user_id}'))
+
+
+@receiver((post_save, post_delete), sender=Follow)
+def bump_follower_responses(sender, instance, **kwargs):
+    bump_versions((f'user:{instance.user_id}',))
+
+
+@receiver(post_save, sender=User)
+def bump_author_responses(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    bump_versions((recipe_catalog.name, f'author:{instance.pk}'))
+
+
+@receiver(connection_created)
+def install_query_wrappers(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+@receiver(request_started)
+def check_connections_on_request(sender, **kwargs):
+    check_connections()
@@ -0,0 +1,198 @@
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from users.models import Follow, User
+from .models import (FavoriteRecipe, Ingredient, Recipe, RecipeIngredient,
+                     ShoppingCart, Tag)
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class RecipeListQueriesTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass')
+        authors = [
+            User.objects.create_user(
+                username=f'author{number}',
+                email=f'author{number}@example.com', password='pass')
+            for number in range(5)
+        ]
+        tags = [
+            Tag.objects.create(name=f'Тэг {number}', slug=f'tag-{number}')
+            for number in range(3)
+        ]
+        ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {number}', measurement_unit='г')
+            for number in range(5)
+        ]
+        for number in range(25):
+            recipe = Recipe.objects.create(
+                author=authors[number % len(authors)],
+                name=f'Рецепт {number}', text='Описание', cooking_time=10,
+                image='recipe.png')
+            recipe.tags.set(tags[:number % 3 + 1])
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(recipe=recipe, ingredient=ingredient,
+                                 amount=number + 1)
+                for ingredient in ingredients[:number % 5 + 1])
+            if number % 2:
+                FavoriteRecipe.objects.create(user=cls.user, recipe=recipe)
+            if number % 3:
+                ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+        Follow.objects.create(user=cls.user, author=authors[0])
+
+    def assert_constant_queries(self):
+        with self.assertNumQueries(5):
+            small = self.client.get('/api/recipes/?limit=2')
+        with self.assertNumQueries(5):
+            large = self.client.get('/api/recipes/?limit=20')
+        self.assertEqual(len(small.data['results']), 2)
+        self.assertEqual(len(large.data['results']), 20)
+        return large.data['results']
+
+    def test_anonymous_list_queries_do_not_depend_on_page_size(self):
+        for recipe in self.assert_constant_queries():
+            self.assertFalse(recipe['is_favorited'])
+            self.assertFalse(recipe['is_in_shopping_cart'])
+
+    def test_authenticated_list_queries_do_not_depend_on_page_size(self):
+        self.client.force_authenticate(self.user)
+        results = self.assert_constant_queries()
+        favorited = set(FavoriteRecipe.objects.filter(
+            user=self.user).values_list('recipe', flat=True))
+        in_cart = set(ShoppingCart.objects.filter(
+            user=self.user).values_list('recipe', flat=True))
+        for recipe in results:
+            self.assertEqual(recipe['is_favorited'], recipe['id'] in favorited)
+            self.assertEqual(
+                recipe['is_in_shopping_cart'], recipe['id'] in in_cart)
+
+    @override_settings(PAGINATION_COUNT_CACHE_TIMEOUT=60)
+    def test_cached_count_of_empty_result(self):
+        for path in ('/api/recipes/?is_favorited=1',
+                     '/api/recipes/?search=несуществующий'):
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['count'], 0)
+
+    def test_cursor_pagination_rejects_custom_ordering(self):
+        response = self.client.get('/api/recipes/?pagination=cursor')
+        self.assertEqual(response.status_code, 200)
+        for param in ('ordering=-popularity', 'search=Рецепт'):
+            response = self.client.get(
+                f'/api/recipes/?pagination=cursor&{param}')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn(param.split('=')[0], response.data)
+
+
+class UserRelationsTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.other, cls.author = (
+            User.objects.create_user(
+                username=name, email=f'{name}@example.com', password='pass')
+            for name in ('reader', 'other', 'author')
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.author, name='Рецепт', text='Описание',
+            cooking_time=10, image='recipe.png')
+        with cls.captureOnCommitCallbacks(execute=True):
+            FavoriteRecipe.objects.create(user=cls.other, recipe=cls.recipe)
+            ShoppingCart.objects.create(user=cls.other, recipe=cls.recipe)
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def assert_added_once(self, url, model, message):
+        response = self.client.post(url, {'id': 999}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['id'], self.recipe.pk)
+        self.assertTrue(
+            model.objects.filter(user=self.user, recipe=self.recipe).exists())
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['non_field_errors'], [message])
+
+    def test_favorite_takes_recipe_from_url(self):
+        self.assert_added_once(
+            f'/api/recipes/{self.recipe.pk}/favorite/', FavoriteRecipe,
+            'Рецепт уже добавлен в избранное')
+
+    def test_shopping_cart_takes_recipe_from_url(self):
+        self.assert_added_once(
+            f'/api/recipes/{self.recipe.pk}/shopping_cart/', ShoppingCart,
+            'Рецепт уже добавлен в список покупок')
+
+    def test_subscribe_takes_author_from_url(self):
+        Follow.objects.create(user=self.other, author=self.author)
+        url = f'/api/users/{self.author.pk}/subscribe/'
+        response = self.client.post(url, {'id': 999}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['id'], self.author.pk)
+        self.assertTrue(Follow.objects.filter(
+            user=self.user, author=self.author).exists())
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data['non_field_errors'],
+            ['Вы уже подписаны на этого пользователя'])
+
+    def test_subscriptions_recipes_limit(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        for value in ('abc', '-1', '1.5'):
+            response = self.client.get(
+                f'/api/users/subscriptions/?recipes_limit={value}')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('recipes_limit', response.data)
+        for value, count in (('0', 0), ('1', 1), ('', 1)):
+            response = self.client.get(
+                f'/api/users/subscriptions/?recipes_limit={value}')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                len(response.data['results'][0]['recipes']), count)
+
+    def test_counters_follow_rows_from_any_code_path(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f'/api/recipes/{self.recipe.pk}/favorite/')
+            ShoppingCart.objects.create(user=self.user, recipe=self.recipe)
+        self.assertEqual(response.status_code, 201)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 2)
+        self.assertEqual(self.recipe.in_carts_count, 2)
+        Recipe.objects.filter(pk=self.recipe.pk).update(favorites_count=0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other.delete()
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 1)
+        self.assertEqual(self.recipe.in_carts_count, 1)
+
+
+class DownloadShoppingCartTest(APITestCase):
+
+    def test_anonymous_download_is_unauthorized(self):
+        for export_format in ('txt', 'csv', 'json'):
+            response = self.client.get(
+                f'/api/recipes/download_shopping_cart/?format={export_format}')
+            self.assertEqual(response.status_code, 401)
+
+
+class MetricsTest(APITestCase):
+
+    def test_metrics_are_disabled_by_default(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_require_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        response = self.client.get(
+            '/metrics', HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(response.status_code, 401)
+        response = self.client.get(
+            '/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'foodgram_requests_total', response.content)
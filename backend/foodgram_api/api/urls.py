@@ -1,6 +1,8 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from .async_views import make_views_async
 from .views import (DownloadShoppingCartViewSet, FavoriteRecipesViewSet,
                     IngredientViewSet, RecipeViewSet, ShoppingCartViewSet,
                     SubscribeListViewSet, SubscribeViewSet, TagViewSet)
@@ -25,9 +27,22 @@ router.register(
 router.register(
     r'recipes', RecipeViewSet, basename='recipes')
 
+bulk_actions = {'post': 'add_many', 'delete': 'delete_many'}
+
+router_urls = [
+    path('recipes/favorite/',
+         FavoriteRecipesViewSet.as_view(bulk_actions),
+         name='favorite-bulk'),
+    path('recipes/shopping_cart/',
+         ShoppingCartViewSet.as_view(bulk_actions),
+         name='shopping-cart-bulk'),
+    *router.urls,
+]
+if settings.ASYNC_VIEWS:
+    router_urls = make_views_async(router_urls)
 
 urlpatterns = [
-    path('', include(router.urls)),
+    path('', include(router_urls)),
     path('', include('djoser.urls')),
     path(r'auth/', include('djoser.urls.authtoken')),
 ]
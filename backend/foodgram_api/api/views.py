@@ -1,88 +1,212 @@
-from django.db.models import Sum
-from django.http.response import HttpResponse
+from django.conf import settings
+from django.db.models import Count, OuterRef, Prefetch, Subquery
+from django.http.response import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.functional import cached_property
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
 from users.models import Follow, User
+from .cache import (ingredient_catalog, recipe_catalog,
+                    recipe_detail_catalog, tag_catalog)
+from .exporters import EXPORT_FORMATS, iter_rows
+from .fast_serializers import (recipe_rows, serialize_recipes,
+                               serialize_subscriptions, subscription_rows)
 from .filters import IngredientSearchFilter, RecipeFilter
-from .mixins import AddAndDeleteMixin
-from .models import FavoriteRecipe, Ingredient, Recipe, ShoppingCart, Tag
-from .pagination import CustomPageNumberPagination
-from .serializers import (DownloadShoppingCartSerializer,
+from .matching import recipe_ingredient_index
+from .mixins import (AddAndDeleteMixin, CachedCatalogMixin,
+                     CachedResponseMixin)
+from .models import (FavoriteRecipe, Ingredient, Recipe, RecipeNeighbour,
+                     ShoppingCart, Tag)
+from .pagination import (CustomPageNumberPagination, RecipePagination,
+                         SubscriptionPagination)
+from .serializers import (RECIPE_CARD_FIELDS, DownloadShoppingCartSerializer,
                           FavoriteRecipesSerializer, IngredientSerializer,
+                          PantrySerializer, RecipeMatchSerializer,
                           RecipeReadSerializer, RecipeWriteSerializer,
-                          ShoppingCartSerializer, SubscribeSerializer,
-                          TagSerializer)
+                          ShoppingCartSerializer, ShoppingListItemSerializer,
+                          SubscribeSerializer, TagSerializer,
+                          get_recipes_limit)
+from .shopping_list import cart_changed, get_shopping_list
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(CachedCatalogMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = TagSerializer
     queryset = Tag.objects.all()
+    catalog = tag_catalog
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(CachedCatalogMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = IngredientSerializer
     queryset = Ingredient.objects.all()
     filter_backends = (IngredientSearchFilter,)
-    search_fields = ('^name',)
+    catalog = ingredient_catalog
 
 
 class FavoriteRecipesViewSet(AddAndDeleteMixin, viewsets.ModelViewSet):
     queryset = FavoriteRecipe.objects.all()
     serializer_class = FavoriteRecipesSerializer
     model_class = FavoriteRecipe
+    permission_classes = (permissions.IsAuthenticated,)
 
 
 class ShoppingCartViewSet(AddAndDeleteMixin, viewsets.ModelViewSet):
     queryset = ShoppingCart.objects.all()
     serializer_class = ShoppingCartSerializer
     model_class = ShoppingCart
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def recipes_changed(self, user, recipe_ids):
+        super().recipes_changed(user, recipe_ids)
+        for recipe_id in recipe_ids:
+            cart_changed(user.pk, recipe_id)
 
 
 class DownloadShoppingCartViewSet(viewsets.ModelViewSet):
     serializer_class = DownloadShoppingCartSerializer
     queryset = ShoppingCart.objects.all()
+    permission_classes = (permissions.IsAuthenticated,)
 
-    def get_ingredients_result_string(self, recipes_from_shopping_cart):
-        content = ''
-        recipe_ingredients = recipes_from_shopping_cart.values_list(
-            'recipe__ingredients__name',
-            'recipe__ingredients__measurement_unit').annotate(
-                total=Sum('recipe__ingredients_from_recipe__amount'))
-        for ingredient in recipe_ingredients:
-            content += f'{ingredient[0]} {ingredient[2]} {ingredient[1]}\n'
-        return content
+    def perform_content_negotiation(self, request, force=False):
+        return super().perform_content_negotiation(request, force=True)
 
     def list(self, request, *args, **kwargs):
-        user = request.user
-        recipes_from_shopping_cart = ShoppingCart.objects.filter(
-            user=user)
-        content = self.get_ingredients_result_string(
-            recipes_from_shopping_cart)
-        headers = {
-                'Content-Type': 'text/plain',
-                'Content-Disposition':
-                'attachment; filename="shopping_cart.txt"'
-            }
-        return HttpResponse(
-            content, headers=headers
-        )
+        export_format = request.query_params.get('format', 'txt')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'format': f'Доступные форматы: {", ".join(EXPORT_FORMATS)}'},
+                status=status.HTTP_400_BAD_REQUEST)
+        content_type, exporter = EXPORT_FORMATS[export_format]
+        rows = iter_rows(get_shopping_list(request.user))
+        response = StreamingHttpResponse(
+            exporter(rows), content_type=content_type)
+        response['Content-Disposition'] = (
+            f'attachment; filename="shopping_cart.{export_format}"')
+        return response
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
-    pagination_class = CustomPageNumberPagination
+    pagination_class = RecipePagination
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
     http_method_names = ('get', 'post', 'patch', 'delete')
+    views = {'card': RECIPE_CARD_FIELDS}
+
+    @cached_property
+    def read_fields(self):
+        params = self.request.query_params
+        if 'fields' in params:
+            fields = tuple(
+                name.strip() for name in params['fields'].split(',')
+                if name.strip())
+            unknown = set(fields) - set(RecipeReadSerializer.Meta.fields)
+            if not fields or unknown:
+                raise ValidationError({'fields': (
+                    'Доступные поля: '
+                    f'{", ".join(RecipeReadSerializer.Meta.fields)}')})
+            return fields
+        if 'view' in params:
+            if params['view'] not in self.views:
+                raise ValidationError({'view': (
+                    f'Доступные представления: {", ".join(self.views)}')})
+            return self.views[params['view']]
+        return None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list' or self.action == 'retrieve':
+            return queryset.for_read(self.request.user, self.read_fields)
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action == 'list' or self.action == 'retrieve':
+            context['fields'] = self.read_fields
+        context['image_variant'] = (
+            'card' if self.action in ('list', 'what_can_i_cook', 'recommended')
+            else 'full')
+        return context
 
     def get_serializer_class(self):
         if self.action == 'list' or self.action == 'retrieve':
             return RecipeReadSerializer
         return RecipeWriteSerializer
 
+    def build_list_response(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        if settings.FAST_READ_SERIALIZERS:
+            page = self.paginate_queryset(
+                recipe_rows(queryset, self.read_fields))
+            data = serialize_recipes(page, self.get_serializer_context())
+        else:
+            page = self.paginate_queryset(queryset)
+            data = self.get_serializer(page, many=True).data
+        return self.get_paginated_response(data), ()
+
+    def build_detail_response(self):
+        recipe = self.get_object()
+        return (
+            Response(self.get_serializer(recipe).data),
+            (f'author:{recipe.author_id}',),
+        )
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            request,
+            (recipe_catalog.name, tag_catalog.name, ingredient_catalog.name),
+            self.build_list_response)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            request,
+            (f'recipe:{kwargs["pk"]}', recipe_detail_catalog.name,
+             tag_catalog.name, ingredient_catalog.name),
+            self.build_detail_response)
+
+    @action(detail=False, url_path='what_can_i_cook')
+    def what_can_i_cook(self, request):
+        serializer = PantrySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        pantry = set(serializer.validated_data['ingredients'])
+        paginator = CustomPageNumberPagination()
+        page = dict(paginator.paginate_queryset(
+            recipe_ingredient_index.match(pantry), request, view=self))
+        recipes = Recipe.objects.for_read(request.user).in_bulk(page)
+        serializer = RecipeMatchSerializer(
+            [recipes[pk] for pk in page if pk in recipes], many=True,
+            context={**self.get_serializer_context(),
+                     'coverage': page, 'pantry': pantry})
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, permission_classes=(permissions.IsAuthenticated,))
+    def shopping_list(self, request):
+        serializer = ShoppingListItemSerializer(
+            get_shopping_list(request.user), many=True)
+        return Response(serializer.data)
+
+    @action(detail=False)
+    def recommended(self, request):
+        paginator = CustomPageNumberPagination()
+        ranking = []
+        if not request.user.is_anonymous:
+            ranking = RecipeNeighbour.objects.recommended_for(request.user)
+        queryset = Recipe.objects.for_read(request.user)
+        if ranking:
+            page = dict(paginator.paginate_queryset(
+                ranking, request, view=self))
+            recipes = queryset.in_bulk(page)
+            page = [recipes[pk] for pk in page if pk in recipes]
+        else:
+            page = paginator.paginate_queryset(
+                queryset.popular(), request, view=self)
+        serializer = RecipeReadSerializer(
+            page, many=True, context=self.get_serializer_context())
+        return paginator.get_paginated_response(serializer.data)
+
 
 class SubscribeViewSet(viewsets.ModelViewSet):
     serializer_class = SubscribeSerializer
@@ -117,7 +241,32 @@ class SubscribeViewSet(viewsets.ModelViewSet):
 class SubscribeListViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = SubscribeSerializer
     permission_classes = (permissions.IsAuthenticated,)
-    pagination_class = CustomPageNumberPagination
+    pagination_class = SubscriptionPagination
+
+    def get_recipes(self):
+        recipes = Recipe.objects.all()
+        recipes_limit = get_recipes_limit(self.request)
+        if recipes_limit is not None:
+            recipes = recipes.filter(pk__in=Subquery(
+                Recipe.objects.filter(
+                    author=OuterRef('author')
+                ).values('pk')[:recipes_limit]
+            ))
+        return recipes
 
     def get_queryset(self):
-        return Follow.objects.filter(user=self.request.user)
+        return Follow.objects.filter(
+            user=self.request.user
+        ).select_related('author').annotate(
+            recipes_count=Count('author__recipes')
+        ).prefetch_related(
+            Prefetch('author__recipes', queryset=self.get_recipes(),
+                     to_attr='subscription_recipes')
+        ).order_by('id')
+
+    def list(self, request, *args, **kwargs):
+        if not settings.FAST_READ_SERIALIZERS:
+            return super().list(request, *args, **kwargs)
+        page = self.paginate_queryset(subscription_rows(self.get_queryset()))
+        return self.get_paginated_response(
+            serialize_subscriptions(page, self.get_recipes(), request))
@@ -1,4 +1,9 @@
 #!/bin/sh
 python3 manage.py migrate
 python3 manage.py collectstatic --noinput
-gunicorn foodgram_api.wsgi:application --bind 0:8000
\ No newline at end of file
+if [ "$SERVER_MODE" = "asgi" ]; then
+    gunicorn foodgram_api.asgi:application --bind 0:8000 \
+        --worker-class uvicorn.workers.UvicornWorker
+else
+    gunicorn foodgram_api.wsgi:application --bind 0:8000
+fi
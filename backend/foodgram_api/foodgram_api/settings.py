@@ -18,6 +18,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'users.apps.UsersConfig',
     'api.apps.ApiConfig',
     'colorfield',
@@ -52,6 +53,7 @@ DJOSER = {
 }
 
 MIDDLEWARE = [
+    'api.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -89,8 +91,13 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='postgres'),
         'HOST': os.getenv('DB_HOST', default='db'),
         'PORT': os.getenv('DB_PORT', default='5432'),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=0)),
+        'POOL_SIZE': int(os.getenv('DB_POOL_SIZE', default=10)),
+        'POOL_TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', default=30)),
     }
 }
+
+DB_CONN_HEALTH_CHECKS = os.getenv('DB_CONN_HEALTH_CHECKS', default='') == '1'
 """
 DATABASES = {
     'default': {
@@ -100,6 +107,27 @@ DATABASES = {
 }
 """
 
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default=''),
+    }
+}
+
+CATALOG_CACHE_ALIAS = 'default'
+
+CATALOG_CACHE_SHARED = os.getenv('CATALOG_CACHE_SHARED', default='') == '1'
+
+CATALOG_LOCAL_TIMEOUT = int(os.getenv('CATALOG_LOCAL_TIMEOUT', default=60))
+
+PAGINATION_COUNT_CACHE_TIMEOUT = int(
+    os.getenv('PAGINATION_COUNT_CACHE_TIMEOUT', default=0))
+
+RESPONSE_CACHE_TIMEOUT = int(
+    os.getenv('RESPONSE_CACHE_TIMEOUT', default=300))
+
 AUTH_USER_MODEL = 'users.user'
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -132,3 +160,24 @@ MEDIA_URL = 'media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', default=2))
+
+ASYNC_VIEWS = os.getenv('SERVER_MODE', default='wsgi') == 'asgi'
+
+ASYNC_VIEW_THREADS = int(os.getenv('ASYNC_VIEW_THREADS', default=8))
+
+N_PLUS_ONE_THRESHOLD = int(os.getenv('N_PLUS_ONE_THRESHOLD', default=5))
+
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', default='')
+
+FAST_JSON_RENDERER = os.getenv('FAST_JSON_RENDERER', default='') == '1'
+
+if FAST_JSON_RENDERER:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ]
+
+FAST_READ_SERIALIZERS = (
+    os.getenv('FAST_READ_SERIALIZERS', default='') == '1')
@@ -2,7 +2,10 @@ from django.contrib import admin
 from django.urls import path
 from django.urls.conf import include
 
+from api.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
+    path('metrics', metrics_view),
 ]
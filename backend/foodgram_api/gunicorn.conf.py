@@ -0,0 +1,19 @@
+import os
+
+
+def on_starting(server):
+    if server.cfg.workers < 2:
+        return
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram_api.settings')
+    from django.conf import settings
+    from django.core.cache import caches
+
+    from api.cache import is_process_local
+
+    for alias in {'default', settings.CATALOG_CACHE_ALIAS}:
+        if is_process_local(caches[alias]):
+            raise RuntimeError(
+                f'Кэш {alias} хранится в памяти процесса, и '
+                f'{server.cfg.workers} воркеров не увидят изменений друг '
+                'друга. Укажите общий кэш в CACHE_BACKEND и CACHE_LOCATION '
+                'или запустите один воркер.')
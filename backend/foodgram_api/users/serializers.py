@@ -26,6 +26,8 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
     def get_is_subscribe(self, obj):
+        if hasattr(obj, 'is_subscribe'):
+            return obj.is_subscribe
         user = self.context['request'].user
         if user.is_anonymous:
             return False